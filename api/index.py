@@ -2,24 +2,42 @@ import os
 import sys
 import json
 import traceback
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 
 # Add project root to sys.path so lib/ can be imported
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if root_dir not in sys.path:
     sys.path.insert(0, root_dir)
 
+from lib.market_data_cache import market_data_cache
+from lib.pricing_cache import PricingCache
+
 app = Flask(__name__)
 
+# Survives between invocations while the serverless instance stays warm
+pricing_cache = PricingCache(max_entries=256, ttl=300)
+
 # Manual CORS handling
 @app.after_request
 def add_cors_headers(response):
     response.headers["Access-Control-Allow-Origin"] = "*"
-    response.headers["Access-Control-Allow-Methods"] = "GET, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = "Content-Type"
+    response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Accept"
     return response
 
 
+def negotiated(payload):
+    """Response in the format and compression the client's headers ask for."""
+    from lib.response_format import render
+
+    body, headers = render(
+        payload,
+        request.headers.get("Accept"),
+        request.headers.get("Accept-Encoding"),
+    )
+    return Response(body, headers=headers)
+
+
 @app.route('/api/health')
 @app.route('/api/')
 @app.route('/api')
@@ -63,9 +81,11 @@ def market_data():
             return jsonify({"error": "Missing ticker"}), 400
 
         fetcher = MarketDataFetcher(ticker.strip().upper())
-        return jsonify({
+        return negotiated({
             "stock_info": fetcher.get_stock_info(),
-            "historical_data": fetcher.get_historical_data(period=period)
+            "historical_data": fetcher.get_historical_data(
+                period=period, orient=request.args.get("orient", "records")
+            )
         })
     except Exception as e:
         return jsonify({"error": str(e), "trace": traceback.format_exc()}), 500
@@ -78,6 +98,7 @@ def price_option():
     try:
         from lib.market_data_fetcher import MarketDataFetcher
         from lib.pricing_models import BlackScholesModel, MonteCarloModel, BinomialModel
+        from lib.exotic_models import ExoticAnalyticModel
 
         ticker = request.args.get("ticker")
         days_str = request.args.get("days_to_expiry")
@@ -102,9 +123,10 @@ def price_option():
         else:
             ms = "ITM" if moneyness < 0.98 else ("OTM" if moneyness > 1.02 else "ATM")
 
+        stock_info = fetcher.get_stock_info()
         market_data = {
             "ticker": ticker,
-            "name": fetcher.get_stock_info().get("name", ticker),
+            "name": stock_info.get("name", ticker),
             "spot_price": round(S, 4),
             "strike_price": round(K, 4),
             "days_to_expiry": days_to_expiry,
@@ -115,19 +137,44 @@ def price_option():
             "option_type": option_type.upper(),
             "moneyness": ms,
             "moneyness_ratio": round(moneyness, 4),
-            "currency": fetcher.get_stock_info().get("currency", "USD"),
+            "currency": stock_info.get("currency", "USD"),
         }
 
-        bs = BlackScholesModel(S, K, T, r, sigma, q)
-        bs_results = bs.get_results(option_type)
+        inputs = (S, K, T, r, sigma, q, option_type)
+        bs_results = pricing_cache.get_or_compute(
+            "black_scholes", inputs, {},
+            lambda: BlackScholesModel(S, K, T, r, sigma, q).get_results(option_type),
+        )
 
         # Use reduced simulations/steps for serverless environment
-        # to avoid timeout and memory issues
-        mc = MonteCarloModel(S, K, T, r, sigma, q, n_simulations=10000, n_steps=50)
-        mc_results = mc.get_results(option_type)
+        # to avoid timeout and memory issues; sampling stops early once
+        # every payoff is priced to 1% (or to a basis point of spot for
+        # near-worthless payoffs) or the time budget is spent
+        mc_settings = {
+            "n_simulations": 50000, "n_steps": 50, "batch_size": 5000,
+            "rel_tolerance": 0.01, "spot_tolerance": 1e-4,
+            "time_budget": 1.0, "seed": 42,
+        }
+        mc_results = pricing_cache.get_or_compute(
+            "monte_carlo", inputs, mc_settings,
+            lambda: MonteCarloModel(
+                S, K, T, r, sigma, q, **mc_settings
+            ).get_results(option_type),
+        )
+
+        # Closed forms on the same monitoring dates as the simulation
+        analytic = ExoticAnalyticModel(
+            S, K, T, r, sigma, q, n_steps=mc_results["time_steps"]
+        )
+        analytic_results = analytic.get_results(option_type)
 
-        bn = BinomialModel(S, K, T, r, sigma, q, n_steps=50)
-        bn_results = bn.get_results(option_type)
+        bn_settings = {"n_steps": 50}
+        bn_results = pricing_cache.get_or_compute(
+            "binomial", inputs, bn_settings,
+            lambda: BinomialModel(
+                S, K, T, r, sigma, q, **bn_settings
+            ).get_results(option_type),
+        )
 
         # Convergence data expected by frontend
         bs_price = bs_results["price"]
@@ -145,17 +192,50 @@ def price_option():
             },
         }
 
-        return jsonify({
+        return negotiated({
             "market_data": market_data,
             "black_scholes": bs_results,
             "monte_carlo": mc_results,
             "binomial": bn_results,
+            "analytic": analytic_results,
             "convergence": convergence,
         })
     except Exception as e:
         return jsonify({"error": str(e), "trace": traceback.format_exc()}), 500
 
 
+@app.route('/api/price_batch', methods=['POST', 'OPTIONS'])
+def price_batch():
+    if request.method == 'OPTIONS':
+        return '', 204
+    try:
+        from lib.batch_pricing import price_contracts
+
+        body = request.get_json(silent=True)
+        contracts = body.get("contracts") if isinstance(body, dict) else body
+        if contracts is None:
+            return jsonify({"error": "Missing contracts"}), 400
+
+        # Smaller trees and batches to stay within the serverless time limit
+        try:
+            result = price_contracts(
+                contracts, n_steps=50, max_contracts=2000, max_tree_contracts=1000
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return negotiated(result)
+    except Exception as e:
+        return jsonify({"error": str(e), "trace": traceback.format_exc()}), 500
+
+
+@app.route('/api/cache_stats')
+def cache_stats():
+    return jsonify({
+        "pricing": pricing_cache.stats(),
+        "market_data": market_data_cache.stats(),
+    })
+
+
 @app.route('/api/options_chain', methods=['GET', 'OPTIONS'])
 def options_chain():
     if request.method == 'OPTIONS':
@@ -169,7 +249,11 @@ def options_chain():
         fetcher = MarketDataFetcher(ticker.strip().upper())
         if request.args.get("only_expiries") == "true":
             return jsonify({"expiries": fetcher.get_options_expiries()})
-        return jsonify(fetcher.get_options_chain(expiry=request.args.get("expiry")))
+        model_iv = request.args.get("model_iv", "false").lower() == "true"
+        return negotiated(fetcher.get_options_chain(
+            expiry=request.args.get("expiry"), model_iv=model_iv,
+            orient=request.args.get("orient", "records"),
+        ))
     except Exception as e:
         return jsonify({"error": str(e), "trace": traceback.format_exc()}), 500
 
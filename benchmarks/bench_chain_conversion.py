@@ -0,0 +1,165 @@
+"""
+Options Chain Conversion Benchmark
+
+Compares the column-wise chain and history conversion in
+lib/market_data_fetcher.py against the per-row iterrows() loop it
+replaced, on a synthetic 10,000-contract chain with missing and
+non-finite quotes, and checks that both produce the same records.
+
+Usage:
+    python benchmarks/bench_chain_conversion.py
+"""
+
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.market_data_fetcher import MarketDataFetcher
+from lib.price_store import frame_to_bars
+
+N_ROWS = 10_000
+
+
+def synthetic_chain(n, seed=0):
+    rng = np.random.default_rng(seed)
+    strike = np.round(np.linspace(50, 550, n), 2)
+    mid = np.abs(300 - strike) * 0.1 + rng.gamma(2.0, 1.5, n)
+    bid = np.round(mid * 0.98, 2)
+    ask = np.round(mid * 1.02, 2)
+    df = pd.DataFrame(
+        {
+            "contractSymbol": [f"SPY{i:06d}" for i in range(n)],
+            "strike": strike,
+            "lastPrice": np.round(mid, 2),
+            "bid": bid,
+            "ask": ask,
+            "volume": rng.integers(0, 5000, n).astype(float),
+            "openInterest": rng.integers(0, 50000, n).astype(float),
+            "impliedVolatility": rng.uniform(0.1, 0.8, n),
+            "inTheMoney": strike < 300,
+        }
+    )
+    # Yahoo leaves gaps in illiquid strikes
+    holes = rng.random(n) < 0.05
+    df.loc[holes, "volume"] = np.nan
+    df.loc[rng.random(n) < 0.02, "bid"] = np.nan
+    df.loc[rng.random(n) < 0.01, "impliedVolatility"] = np.inf
+    return df
+
+
+def _safe_float(val, decimals=None):
+    """The previous per-cell conversion."""
+    try:
+        if val is None:
+            return None
+        f_val = float(val)
+        if np.isnan(f_val) or np.isinf(f_val):
+            return None
+        if decimals is not None:
+            return round(f_val, decimals)
+        return f_val
+    except (ValueError, TypeError):
+        return None
+
+
+def iterrows_chain_to_records(df):
+    """The previous implementation of MarketDataFetcher._chain_to_records."""
+    records = []
+    for _, row in df.iterrows():
+        records.append(
+            {
+                "strike": _safe_float(row.get("strike"), 2),
+                "lastPrice": _safe_float(row.get("lastPrice"), 4),
+                "bid": _safe_float(row.get("bid"), 4),
+                "ask": _safe_float(row.get("ask"), 4),
+                "volume": int(row.get("volume", 0)) if pd.notna(row.get("volume")) else 0,
+                "openInterest": int(row.get("openInterest", 0)) if pd.notna(row.get("openInterest")) else 0,
+                "impliedVolatility": _safe_float(row.get("impliedVolatility"), 4),
+                "inTheMoney": bool(row.get("inTheMoney", False)),
+            }
+        )
+    return records
+
+
+def synthetic_history(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(0.01 * rng.standard_normal(n)))
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 9_000_000, n),
+        },
+        index=pd.bdate_range("1990-01-01", periods=n, tz="America/New_York"),
+    )
+
+
+def iterrows_history_to_records(hist):
+    """The previous implementation of MarketDataFetcher.get_historical_data."""
+    hist = hist.copy()
+    hist.index = hist.index.tz_localize(None)
+    records = []
+    for date, row in hist.iterrows():
+        records.append(
+            {
+                "date": date.strftime("%Y-%m-%d"),
+                "open": round(float(row["Open"]), 2),
+                "high": round(float(row["High"]), 2),
+                "low": round(float(row["Low"]), 2),
+                "close": round(float(row["Close"]), 2),
+                "volume": int(row["Volume"]),
+            }
+        )
+    return records
+
+
+class _Stub(MarketDataFetcher):
+    """Fetcher that serves a fixed history without touching the network."""
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def _daily_bars(self, period):
+        return frame_to_bars(self.hist)
+
+
+def main():
+    fetcher = MarketDataFetcher.__new__(MarketDataFetcher)
+    chain = synthetic_chain(N_ROWS)
+    old = iterrows_chain_to_records(chain)
+    new = fetcher._chain_to_records(chain)
+    print(f"Options chain, {N_ROWS:,} rows")
+    print(f"  records identical: {old == new}")
+    runs = 3
+    for label, fn in (
+        ("iterrows records", lambda: iterrows_chain_to_records(chain)),
+        ("columnar records", lambda: fetcher._chain_to_records(chain)),
+        ("column arrays", lambda: fetcher._chain_to_columns(chain)),
+    ):
+        t = min(timeit.repeat(fn, number=1, repeat=runs))
+        print(f"  {label:18s} {t * 1e3:9.2f} ms")
+
+    hist = synthetic_history(N_ROWS)
+    stub = _Stub(hist)
+    old = iterrows_history_to_records(hist)
+    new = stub.get_historical_data("5y")
+    print(f"\nHistory, {N_ROWS:,} daily bars")
+    print(f"  records identical: {old == new}")
+    for label, fn in (
+        ("iterrows records", lambda: iterrows_history_to_records(hist)),
+        ("columnar records", lambda: stub.get_historical_data("5y")),
+        ("column arrays", lambda: stub.get_historical_data("5y", orient="columns")),
+    ):
+        t = min(timeit.repeat(fn, number=1, repeat=runs))
+        print(f"  {label:18s} {t * 1e3:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
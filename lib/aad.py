@@ -0,0 +1,341 @@
+"""
+Adjoint Algorithmic Differentiation
+
+A small reverse-mode automatic differentiation layer over NumPy arrays.
+Operations on Variables are recorded on a Tape; one backward sweep over
+the tape then yields the derivative of an output with respect to every
+input, at a small constant multiple of the cost of the forward
+calculation, however many inputs there are.
+
+The functions in this module accept Variables and plain numbers or
+arrays alike, so pricing code written against them runs unchanged with
+or without a tape.
+"""
+
+import numpy as np
+
+from lib.numerics import norm_cdf as _norm_cdf
+from lib.numerics import norm_pdf as _norm_pdf
+
+
+def _unbroadcast(adjoint, shape):
+    """Sum an adjoint back down to the shape of a broadcast operand."""
+    while adjoint.ndim > len(shape):
+        adjoint = adjoint.sum(axis=0)
+    for axis, size in enumerate(shape):
+        if size == 1 and adjoint.shape[axis] != 1:
+            adjoint = adjoint.sum(axis=axis, keepdims=True)
+    return adjoint
+
+
+class Tape:
+    """
+    Records operations for a backward pass.
+
+    Each entry holds the (parent index, vector-Jacobian product) pairs of
+    one Variable; leaves have none.
+    """
+
+    def __init__(self):
+        self.nodes = []
+
+    def variable(self, value):
+        """Create an input Variable on this tape."""
+        return self._record(np.asarray(value, dtype=float), ())
+
+    def _record(self, value, parents):
+        self.nodes.append(parents)
+        return Variable(self, value, len(self.nodes) - 1)
+
+    def gradient(self, output, inputs):
+        """
+        Adjoints of sum(output) with respect to each input.
+
+        `inputs` is a dict of name -> Variable (or a list of Variables);
+        the result has the same structure, each adjoint shaped like its
+        input.
+        """
+        named = isinstance(inputs, dict)
+        variables = list(inputs.values()) if named else list(inputs)
+        keep = {v.index for v in variables}
+        adjoints = {output.index: np.ones_like(output.value)}
+        for index in range(output.index, -1, -1):
+            adjoint = adjoints.get(index)
+            if adjoint is None:
+                continue
+            if index not in keep:
+                del adjoints[index]
+            for parent, vjp in self.nodes[index]:
+                contribution = vjp(adjoint)
+                if parent in adjoints:
+                    adjoints[parent] = adjoints[parent] + contribution
+                else:
+                    adjoints[parent] = contribution
+        grads = [
+            adjoints.get(v.index, np.zeros_like(v.value)) for v in variables
+        ]
+        if named:
+            return dict(zip(inputs, grads))
+        return grads
+
+
+class Variable:
+    """A value recorded on a Tape. Supports NumPy-style arithmetic."""
+
+    # Make NumPy defer to the reflected operators below
+    __array_ufunc__ = None
+
+    def __init__(self, tape, value, index):
+        self.tape = tape
+        self.value = value
+        self.index = index
+
+    @property
+    def shape(self):
+        return self.value.shape
+
+    def __len__(self):
+        return len(self.value)
+
+    def __repr__(self):
+        return f"Variable({self.value!r})"
+
+    def __add__(self, other):
+        return _binary(self, other, np.add, lambda g, a, b: g, lambda g, a, b: g)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return _binary(self, other, np.subtract, lambda g, a, b: g, lambda g, a, b: -g)
+
+    def __rsub__(self, other):
+        return _binary(other, self, np.subtract, lambda g, a, b: g, lambda g, a, b: -g)
+
+    def __mul__(self, other):
+        return _binary(
+            self, other, np.multiply, lambda g, a, b: g * b, lambda g, a, b: g * a
+        )
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return _binary(
+            self,
+            other,
+            np.divide,
+            lambda g, a, b: g / b,
+            lambda g, a, b: -g * a / (b * b),
+        )
+
+    def __rtruediv__(self, other):
+        return _binary(
+            other,
+            self,
+            np.divide,
+            lambda g, a, b: g / b,
+            lambda g, a, b: -g * a / (b * b),
+        )
+
+    def __pow__(self, other):
+        return _binary(
+            self,
+            other,
+            np.power,
+            lambda g, a, b: g * b * np.power(a, b - 1),
+            lambda g, a, b: g * np.power(a, b) * np.log(a),
+        )
+
+    def __rpow__(self, other):
+        return _binary(
+            other,
+            self,
+            np.power,
+            lambda g, a, b: g * b * np.power(a, b - 1),
+            lambda g, a, b: g * np.power(a, b) * np.log(a),
+        )
+
+    def __neg__(self):
+        return _unary(self, -self.value, lambda g: -g)
+
+    def __getitem__(self, key):
+        shape = self.value.shape
+
+        def vjp(g):
+            full = np.zeros(shape)
+            if _is_basic_index(key):
+                full[key] = g
+            else:
+                # Fancy indices may repeat, so accumulate
+                np.add.at(full, key, g)
+            return full
+
+        return _unary(self, self.value[key], vjp)
+
+
+def _is_basic_index(key):
+    keys = key if isinstance(key, tuple) else (key,)
+    return all(isinstance(k, (slice, int, type(Ellipsis))) for k in keys)
+
+
+def _value(x):
+    return x.value if isinstance(x, Variable) else np.asarray(x, dtype=float)
+
+
+def _tape_of(*args):
+    for x in args:
+        if isinstance(x, Variable):
+            return x.tape
+    return None
+
+
+def _unary(x, value, vjp):
+    if not isinstance(x, Variable):
+        return value
+    return x.tape._record(value, ((x.index, vjp),))
+
+
+def _binary(a, b, op, vjp_a, vjp_b):
+    a_value, b_value = _value(a), _value(b)
+    value = op(a_value, b_value)
+    parents = []
+    for operand, vjp in ((a, vjp_a), (b, vjp_b)):
+        if isinstance(operand, Variable):
+            shape = operand.value.shape
+            parents.append(
+                (
+                    operand.index,
+                    lambda g, vjp=vjp, shape=shape: _unbroadcast(
+                        vjp(g, a_value, b_value), shape
+                    ),
+                )
+            )
+    tape = _tape_of(a, b)
+    if tape is None:
+        return value
+    return tape._record(value, tuple(parents))
+
+
+def exp(x):
+    value = np.exp(_value(x))
+    return _unary(x, value, lambda g: g * value)
+
+
+def log(x):
+    x_value = _value(x)
+    return _unary(x, np.log(x_value), lambda g: g / x_value)
+
+
+def sqrt(x):
+    value = np.sqrt(_value(x))
+    return _unary(x, value, lambda g: 0.5 * g / value)
+
+
+def norm_cdf(x):
+    x_value = _value(x)
+    return _unary(x, _norm_cdf(x_value), lambda g: g * _norm_pdf(x_value))
+
+
+def where(condition, a, b):
+    condition = np.asarray(condition, dtype=bool)
+    return _binary(
+        a,
+        b,
+        lambda x, y: np.where(condition, x, y),
+        lambda g, x, y: np.where(condition, g, 0.0),
+        lambda g, x, y: np.where(condition, 0.0, g),
+    )
+
+
+def _select(a, b, op, first_wins):
+    """
+    op(a, b) elementwise, where first_wins marks where a is selected.
+
+    Ties split the adjoint evenly between the arguments, which is the
+    average of the one-sided derivatives; sending it all to one side
+    biases derivatives at kinks such as an at-the-money payoff node.
+    """
+    a_value, b_value = _value(a), _value(b)
+    weight = np.where(first_wins, 1.0, np.where(a_value == b_value, 0.5, 0.0))
+    return _binary(
+        a,
+        b,
+        op,
+        lambda g, x, y: g * weight,
+        lambda g, x, y: g * (1.0 - weight),
+    )
+
+
+def maximum(a, b):
+    """Elementwise maximum; ties split the adjoint between the arguments."""
+    return _select(a, b, np.maximum, _value(a) > _value(b))
+
+
+def minimum(a, b):
+    """Elementwise minimum; ties split the adjoint between the arguments."""
+    return _select(a, b, np.minimum, _value(a) < _value(b))
+
+
+def sum(x, axis=None):
+    x_value = _value(x)
+    shape = x_value.shape
+
+    def vjp(g):
+        if axis is not None:
+            g = np.expand_dims(g, axis)
+        return np.broadcast_to(g, shape).copy()
+
+    return _unary(x, x_value.sum(axis=axis), vjp)
+
+
+def mean(x, axis=None):
+    count = _value(x).size if axis is None else _value(x).shape[axis]
+    return sum(x, axis) / count
+
+
+def reshape(x, shape):
+    x_value = _value(x)
+    return _unary(x, x_value.reshape(shape), lambda g: g.reshape(x_value.shape))
+
+
+def cumsum(x, axis=-1):
+    x_value = _value(x)
+
+    def vjp(g):
+        return np.flip(np.cumsum(np.flip(g, axis), axis), axis)
+
+    return _unary(x, np.cumsum(x_value, axis=axis), vjp)
+
+
+def _extremum(x, axis, select):
+    x_value = _value(x)
+    index = np.expand_dims(select(x_value, axis=axis), axis)
+
+    def vjp(g):
+        full = np.zeros(x_value.shape)
+        np.put_along_axis(full, index, np.expand_dims(g, axis), axis)
+        return full
+
+    value = np.take_along_axis(x_value, index, axis).squeeze(axis)
+    return _unary(x, value, vjp)
+
+
+def amin(x, axis=-1):
+    """Minimum along an axis; the adjoint goes to the (first) minimizer."""
+    return _extremum(x, axis, np.argmin)
+
+
+def amax(x, axis=-1):
+    """Maximum along an axis; the adjoint goes to the (first) maximizer."""
+    return _extremum(x, axis, np.argmax)
+
+
+def value_and_gradient(function, **inputs):
+    """
+    Evaluate function(**inputs) on a fresh tape and differentiate it.
+
+    Returns (value, dict of input name -> adjoint of sum(value)).
+    """
+    tape = Tape()
+    variables = {name: tape.variable(value) for name, value in inputs.items()}
+    output = function(**variables)
+    return output.value, tape.gradient(output, variables)
@@ -0,0 +1,495 @@
+"""
+Batch Pricing
+
+Prices a list of option contracts across many underlyings in one call.
+Market data is fetched once per ticker (MarketDataFetcher.fetch_many),
+and each engine then prices all of its contracts in a single vectorized
+pass: BatchBlackScholesModel for European Black-Scholes prices and
+Greeks, BatchBinomialModel for European or American trees (delta, gamma
+and theta from the trees themselves, vega and rho from bumped trees
+stacked into one sweep), and implied volatilities for contracts quoted
+with a market price: ImpliedVolatilitySolver for European quotes and a
+vectorized root search on the binomial trees for American ones.
+
+A contract is a dict:
+
+    ticker          Underlying symbol (required)
+    option_type     "call" (default) or "put"
+    strike          Strike price (default: at the money)
+    days_to_expiry  Days until expiry, or
+    expiry          Expiry date as YYYY-MM-DD
+    style           "european" (default) or "american"
+    engines         List of "black_scholes" / "binomial" (default:
+                    black_scholes for European, binomial for American)
+    greeks          true for all of delta, gamma, theta, vega, rho, or a
+                    list of them
+    quantity        Position size for the book value (default 1)
+    market_price    Optional quote to invert to an implied volatility
+
+Invalid contracts and tickers without market data get an "error" entry
+in their result instead of failing the whole batch. Contracts that need a
+tree (the binomial engine or an American market_price) are capped per
+batch separately from the overall count, since they cost far more.
+"""
+
+import datetime
+
+import numpy as np
+
+from lib.implied_volatility import (
+    BELOW_INTRINSIC,
+    CONVERGED,
+    FLAT_VEGA,
+    INVALID_QUOTE,
+    MAX_ITERATIONS,
+    MAX_SIGMA_RESOLUTION,
+    OUT_OF_BRACKET,
+    ImpliedVolatilitySolver,
+)
+from lib.pricing_models import BatchBinomialModel, BatchBlackScholesModel
+
+ENGINES = ("black_scholes", "binomial")
+STYLES = ("european", "american")
+GREEKS = ("delta", "gamma", "theta", "vega", "rho")
+DEFAULT_ENGINES = {"european": ["black_scholes"], "american": ["binomial"]}
+
+# Bump sizes for binomial vega and rho
+VOL_BUMP = 0.01
+RATE_BUMP = 0.0001
+
+# Volatility search range and relative price tolerance for American quotes
+TREE_SIGMA_BOUNDS = (1e-4, 5.0)
+TREE_IV_TOL = 1e-6
+TREE_IV_MAX_ITER = 60
+
+
+def _parse_days(contract, today):
+    if contract.get("days_to_expiry") is not None:
+        try:
+            days = int(contract["days_to_expiry"])
+        except (ValueError, TypeError):
+            raise ValueError("days_to_expiry must be a positive integer")
+    elif contract.get("expiry"):
+        try:
+            expiry = datetime.date.fromisoformat(str(contract["expiry"]))
+        except ValueError:
+            raise ValueError("expiry must be a date in YYYY-MM-DD format")
+        days = (expiry - today).days
+    else:
+        raise ValueError("Missing days_to_expiry or expiry")
+    if days <= 0:
+        raise ValueError("Contract has expired")
+    return days
+
+
+def _optional_float(contract, name):
+    value = contract.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        value = float(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"{name} must be a number")
+    if not np.isfinite(value):
+        raise ValueError(f"{name} must be finite")
+    return value
+
+
+def parse_contract(contract, today=None):
+    """Validate one contract dict and fill in its defaults."""
+    if not isinstance(contract, dict):
+        raise ValueError("Each contract must be an object")
+    today = today or datetime.date.today()
+    ticker = str(contract.get("ticker") or "").strip().upper()
+    if not ticker:
+        raise ValueError("Missing ticker")
+    option_type = str(contract.get("option_type", "call")).strip().lower()
+    if option_type not in ("call", "put"):
+        raise ValueError("option_type must be 'call' or 'put'")
+    style = str(contract.get("style", "european")).strip().lower()
+    if style not in STYLES:
+        raise ValueError(f"style must be one of {STYLES}")
+
+    engines = contract.get("engines") or DEFAULT_ENGINES[style]
+    if isinstance(engines, str):
+        engines = [engines]
+    engines = [str(e).strip().lower() for e in engines]
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        raise ValueError(f"engines must be among {ENGINES}")
+    if style == "american" and "black_scholes" in engines:
+        raise ValueError("black_scholes prices European exercise only")
+
+    greeks = contract.get("greeks", False)
+    if greeks is True:
+        greeks = list(GREEKS)
+    elif not greeks:
+        greeks = []
+    else:
+        greeks = [greeks] if isinstance(greeks, str) else list(greeks)
+        if any(g not in GREEKS for g in greeks):
+            raise ValueError(f"greeks must be among {GREEKS}")
+
+    strike = _optional_float(contract, "strike")
+    if strike is not None and strike <= 0:
+        raise ValueError("strike must be positive")
+    quantity = _optional_float(contract, "quantity")
+    return {
+        "ticker": ticker,
+        "option_type": option_type,
+        "strike": strike,
+        "days_to_expiry": _parse_days(contract, today),
+        "style": style,
+        "engines": list(dict.fromkeys(engines)),
+        "greeks": greeks,
+        "quantity": 1.0 if quantity is None else quantity,
+        "market_price": _optional_float(contract, "market_price"),
+    }
+
+
+def _fetch_market_data(tickers):
+    from lib.market_data_fetcher import MarketDataFetcher
+
+    return MarketDataFetcher.fetch_many(tickers)
+
+
+def _fetch_risk_free_rate():
+    from lib.market_data_fetcher import MarketDataFetcher
+
+    return MarketDataFetcher("^IRX").get_risk_free_rate()
+
+
+def _binomial(inputs, n_steps, american, greeks):
+    """
+    Binomial prices and Greeks for a dict of input arrays, in
+    BlackScholesModel units (theta per day, vega and rho per 1%). Delta,
+    gamma and theta are read from the extended trees; vega and rho come
+    from bumped trees stacked into one more sweep.
+    """
+    model = BatchBinomialModel(**inputs, n_steps=n_steps)
+    price, results = model.calculate_greeks(american)
+    sigma, r = inputs["sigma"], inputs["r"]
+    sigma_down = np.maximum(sigma - VOL_BUMP, 1e-4)
+    bumps = {
+        "vega": ("sigma", sigma + VOL_BUMP, sigma_down),
+        "rho": ("r", r + RATE_BUMP, r - RATE_BUMP),
+    }
+    wanted = [g for g in bumps if g in greeks]
+    if wanted:
+        stacked = {}
+        for name, values in inputs.items():
+            columns = []
+            for g in wanted:
+                bumped, up, down = bumps[g]
+                columns += [up, down] if name == bumped else [values, values]
+            stacked[name] = np.concatenate(columns)
+        bumped_model = BatchBinomialModel(**stacked, n_steps=n_steps)
+        if american:
+            prices = bumped_model.american_option_price()[0]
+        else:
+            prices = bumped_model.european_option_price()
+        prices = prices.reshape(2 * len(wanted), len(price))
+        for position, g in enumerate(wanted):
+            _, up, down = bumps[g]
+            up_price, down_price = prices[2 * position : 2 * position + 2]
+            results[g] = (up_price - down_price) / (up - down) / 100
+    return price, {g: results[g] for g in greeks}
+
+
+def _american_implied_volatility(inputs, quotes, n_steps):
+    """
+    Invert American quotes on the binomial trees.
+
+    All contracts are solved together with Illinois-modified regula falsi
+    on sigma, each iteration being one BatchBinomialModel sweep over the
+    contracts still unsolved. Returns (implied volatilities, statuses)
+    using the ImpliedVolatilitySolver status strings.
+    """
+    quotes = np.asarray(quotes, dtype=float)
+    sigma = np.full(len(quotes), np.nan)
+    status = np.full(len(quotes), MAX_ITERATIONS, dtype=object)
+    terms = {name: values for name, values in inputs.items() if name != "sigma"}
+    sign = np.where(terms["option_type"] == "call", 1.0, -1.0)
+    intrinsic = np.maximum(sign * (terms["S"] - terms["K"]), 0)
+
+    def price_error(rows, vol):
+        model = BatchBinomialModel(
+            **{name: values[rows] for name, values in terms.items()},
+            sigma=vol,
+            n_steps=n_steps,
+        )
+        return model.american_option_price()[0] - quotes[rows]
+
+    invalid = ~np.isfinite(quotes) | (quotes <= 0)
+    below = ~invalid & (quotes < intrinsic * (1 - TREE_IV_TOL))
+    status[invalid] = INVALID_QUOTE
+    status[below] = BELOW_INTRINSIC
+    rows = np.flatnonzero(~(invalid | below))
+    # Below |r - q| sqrt(dt) the up probability leaves [0, 1] and the tree
+    # prices are meaningless, so the bracket starts at twice that
+    dt = np.maximum(terms["T"][rows], 1e-10) / n_steps
+    drift_floor = 2 * np.abs(terms["r"][rows] - terms["q"][rows]) * np.sqrt(dt)
+    low = np.maximum(TREE_SIGMA_BOUNDS[0], drift_floor)
+    high = np.full(len(rows), TREE_SIGMA_BOUNDS[1])
+    f_low, f_high = price_error(rows, low), price_error(rows, high)
+    # Quotes the tree cannot reach inside the bounds; a quote matched
+    # already at the lowest sigma sits on the exercise floor, where the
+    # price does not depend on sigma
+    floor = np.abs(f_low) <= TREE_IV_TOL * quotes[rows]
+    outside = ~floor & ((f_low > 0) | (f_high < 0))
+    status[rows[floor]] = FLAT_VEGA
+    status[rows[outside]] = OUT_OF_BRACKET
+    keep = ~(floor | outside)
+    rows, low, high, f_low, f_high = (
+        a[keep] for a in (rows, low, high, f_low, f_high)
+    )
+    # -1 / +1 when the last update moved the low / high end
+    side = np.zeros(len(rows), dtype=int)
+
+    for _ in range(TREE_IV_MAX_ITER):
+        if len(rows) == 0:
+            break
+        with np.errstate(divide="ignore", invalid="ignore"):
+            guess = high - f_high * (high - low) / (f_high - f_low)
+        guess = np.where(
+            (guess > low) & (guess < high), guess, 0.5 * (low + high)
+        )
+        f = price_error(rows, guess)
+        done = np.abs(f) <= TREE_IV_TOL * quotes[rows]
+        # As in ImpliedVolatilitySolver, a match only identifies sigma if
+        # the tolerance corresponds to a small enough sigma move; vega is a
+        # forward difference on one more sweep over the matched contracts
+        flat = np.zeros(len(rows), dtype=bool)
+        if done.any():
+            matched = rows[done]
+            vega = (
+                price_error(matched, guess[done] + VOL_BUMP) - f[done]
+            ) / VOL_BUMP
+            with np.errstate(divide="ignore", invalid="ignore"):
+                resolution = TREE_IV_TOL * quotes[matched] / vega
+            flat[done] = ~(resolution <= MAX_SIGMA_RESOLUTION)
+            done &= ~flat
+        sigma[rows[done]] = guess[done]
+        status[rows[done]] = CONVERGED
+
+        moves_high = f > 0
+        # Illinois step: halve the stale end's error when the same end
+        # moves twice in a row, so the bracket keeps shrinking from both
+        f_low = np.where(moves_high & (side == 1), 0.5 * f_low, f_low)
+        f_high = np.where(~moves_high & (side == -1), 0.5 * f_high, f_high)
+        high = np.where(moves_high, guess, high)
+        f_high = np.where(moves_high, f, f_high)
+        low = np.where(moves_high, low, guess)
+        f_low = np.where(moves_high, f_low, f)
+        side = np.where(moves_high, 1, -1)
+
+        # The tree price is flat in sigma across what is left of the bracket
+        flat |= ~done & (high - low < 1e-10)
+        status[rows[flat]] = FLAT_VEGA
+        keep = ~(done | flat)
+        rows, low, high, f_low, f_high, side = (
+            a[keep] for a in (rows, low, high, f_low, f_high, side)
+        )
+    return sigma, status
+
+
+def _rounded(value, digits=6):
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def price_contracts(
+    contracts,
+    n_steps=200,
+    max_contracts=10000,
+    max_tree_contracts=2000,
+    market_data=None,
+    risk_free_rate=None,
+):
+    """
+    Price a list of contract dicts.
+
+    market_data is a callable taking a list of tickers and returning a
+    DataFrame indexed by ticker with spot, volatility, dividend_yield and
+    error columns (MarketDataFetcher.fetch_many by default); risk_free_rate
+    defaults to the 13-week T-bill rate. Returns a dict with one result
+    per contract in input order, the market data used and the total value
+    of the book (quantity times the price from each contract's first
+    engine). At most max_tree_contracts contracts may need a tree (the
+    binomial engine or an American market_price).
+    """
+    if not isinstance(contracts, (list, tuple)):
+        raise ValueError("contracts must be a list")
+    if len(contracts) > max_contracts:
+        raise ValueError(f"At most {max_contracts} contracts per batch")
+
+    today = datetime.date.today()
+    parsed, results = [], []
+    for index, contract in enumerate(contracts):
+        try:
+            parsed.append(parse_contract(contract, today))
+            results.append({"index": index})
+        except ValueError as e:
+            parsed.append(None)
+            results.append({"index": index, "error": str(e)})
+
+    # Binomial pricing and American quotes each cost one or more tree sweeps
+    tree_contracts = sum(
+        1
+        for c in parsed
+        if c is not None
+        and (
+            "binomial" in c["engines"]
+            or (c["style"] == "american" and c["market_price"] is not None)
+        )
+    )
+    if tree_contracts > max_tree_contracts:
+        raise ValueError(
+            f"At most {max_tree_contracts} binomial or American-quote "
+            "contracts per batch"
+        )
+
+    tickers = list(dict.fromkeys(c["ticker"] for c in parsed if c is not None))
+    market = (market_data or _fetch_market_data)(tickers) if tickers else None
+    r = _fetch_risk_free_rate() if risk_free_rate is None else risk_free_rate
+
+    market_summary, valid = {}, []
+    for ticker in tickers:
+        row = market.loc[ticker] if ticker in market.index else None
+        fields = ("spot", "volatility", "dividend_yield")
+        if row is None or any(row.get(f) is None or not np.isfinite(row[f]) for f in fields):
+            error = None if row is None else row.get("error")
+            market_summary[ticker] = {"error": error or "No market data available"}
+        else:
+            market_summary[ticker] = {f: float(row[f]) for f in fields}
+    for i, contract in enumerate(parsed):
+        if contract is None:
+            continue
+        data = market_summary[contract["ticker"]]
+        if "error" in data:
+            results[i]["error"] = f"{contract['ticker']}: {data['error']}"
+        else:
+            valid.append(i)
+
+    # Flat input arrays over the valid contracts
+    n = len(valid)
+    columns = {
+        "S": np.empty(n),
+        "K": np.empty(n),
+        "T": np.empty(n),
+        "r": np.full(n, r),
+        "sigma": np.empty(n),
+        "q": np.empty(n),
+        "option_type": np.empty(n, dtype=object),
+    }
+    for j, i in enumerate(valid):
+        contract = parsed[i]
+        data = market_summary[contract["ticker"]]
+        strike = contract["strike"] if contract["strike"] is not None else data["spot"]
+        columns["S"][j] = data["spot"]
+        columns["K"][j] = strike
+        columns["T"][j] = contract["days_to_expiry"] / 365
+        columns["sigma"][j] = data["volatility"]
+        columns["q"][j] = data["dividend_yield"]
+        columns["option_type"][j] = contract["option_type"]
+        results[i].update(
+            ticker=contract["ticker"],
+            option_type=contract["option_type"],
+            style=contract["style"],
+            strike=round(strike, 4),
+            days_to_expiry=contract["days_to_expiry"],
+            quantity=contract["quantity"],
+        )
+    columns["option_type"] = columns["option_type"].astype(str)
+
+    def select(rows):
+        return {name: values[rows] for name, values in columns.items()}
+
+    def contracts_using(engine, style=None, greeks=None):
+        return np.array(
+            [
+                j
+                for j, i in enumerate(valid)
+                if engine in parsed[i]["engines"]
+                and (style is None or parsed[i]["style"] == style)
+                and (greeks is None or tuple(parsed[i]["greeks"]) == greeks)
+            ],
+            dtype=int,
+        )
+
+    def store(rows, engine, prices, greek_values):
+        for k, j in enumerate(rows):
+            contract = parsed[valid[j]]
+            entry = {"price": _rounded(prices[k])}
+            if contract["greeks"]:
+                entry["greeks"] = {
+                    g: _rounded(greek_values[g][k]) for g in contract["greeks"]
+                }
+            results[valid[j]][engine] = entry
+
+    rows = contracts_using("black_scholes")
+    if len(rows):
+        bs = BatchBlackScholesModel(**select(rows)).get_results()
+        store(rows, "black_scholes", bs["price"], bs["greeks"])
+
+    # Binomial groups share exercise style and the set of Greeks requested,
+    # so each group is one stacked tree sweep
+    groups = {
+        (parsed[i]["style"], tuple(parsed[i]["greeks"]))
+        for i in valid
+        if "binomial" in parsed[i]["engines"]
+    }
+    for style, greeks in sorted(groups):
+        rows = contracts_using("binomial", style, greeks)
+        inputs = select(rows)
+        price, greek_values = _binomial(inputs, n_steps, style == "american", greeks)
+        store(rows, "binomial", price, greek_values)
+
+    # European quotes invert Black-Scholes, American quotes the trees
+    for style in STYLES:
+        rows = np.array(
+            [
+                j
+                for j, i in enumerate(valid)
+                if parsed[i]["market_price"] is not None
+                and parsed[i]["style"] == style
+            ],
+            dtype=int,
+        )
+        if len(rows) == 0:
+            continue
+        inputs = select(rows)
+        quotes = [parsed[valid[j]]["market_price"] for j in rows]
+        if style == "european":
+            inputs.pop("sigma")
+            solved = ImpliedVolatilitySolver(**inputs).solve(quotes)
+            values, statuses = solved["implied_volatility"], solved["status"]
+            model = "black_scholes"
+        else:
+            values, statuses = _american_implied_volatility(inputs, quotes, n_steps)
+            model = "binomial"
+        for k, j in enumerate(rows):
+            results[valid[j]]["implied_volatility"] = {
+                "value": _rounded(values[k]),
+                "status": statuses[k],
+                "model": model,
+            }
+
+    total_value = 0.0
+    for i in valid:
+        contract = parsed[i]
+        price = results[i][contract["engines"][0]]["price"]
+        if price is not None:
+            results[i]["value"] = round(contract["quantity"] * price, 6)
+            total_value += results[i]["value"]
+
+    return {
+        "count": len(contracts),
+        "priced": len(valid),
+        "failed": len(contracts) - len(valid),
+        "risk_free_rate": round(r, 6),
+        "binomial_steps": n_steps,
+        "market_data": market_summary,
+        "total_value": round(total_value, 6),
+        "results": results,
+    }
@@ -0,0 +1,232 @@
+"""
+Analytic Exotic Options
+
+Closed-form prices for the path-dependent payoffs MonteCarloModel
+simulates: geometric Asian (Kemna-Vorst), floating-strike lookback
+(Goldman-Sosin-Gatto) and single barrier options (Reiner-Rubinstein).
+Every function accepts NumPy arrays and broadcasts over its inputs, so a
+whole strip of strikes is priced in one call.
+
+The formulas assume continuous monitoring; lookbacks and barriers take an
+optional number of monitoring dates and apply the Broadie-Glasserman-Kou
+shift of 0.5826 sigma sqrt(dt) to approximate discrete monitoring.
+"""
+
+import numpy as np
+
+from lib.numerics import norm_cdf
+
+# Broadie-Glasserman-Kou constant, -zeta(1/2) / sqrt(2 pi)
+BGK_BETA = 0.5825971579390106
+
+BARRIER_TYPES = ("down-and-out", "up-and-out", "down-and-in", "up-and-in")
+
+
+def _sign(option_type):
+    option_type = np.char.lower(np.asarray(option_type, dtype=str))
+    return np.where(option_type == "call", 1.0, -1.0)
+
+
+def bgk_shift(sigma, T, monitoring_dates):
+    """Multiplicative barrier shift exp(beta sigma sqrt(dt)) for discrete monitoring."""
+    return np.exp(BGK_BETA * sigma * np.sqrt(T / monitoring_dates))
+
+
+def geometric_asian_price(S, K, T, r, sigma, q=0, n_steps=252, option_type="call"):
+    """
+    Closed-form geometric Asian price.
+
+    With n_steps the average runs over the n_steps + 1 equally spaced
+    fixings from 0 to T (including the initial price), matching
+    MonteCarloModel's average. n_steps=None gives the continuously
+    averaged Kemna-Vorst price.
+    """
+    if n_steps is None:
+        var = sigma**2 * T / 3
+    else:
+        var = sigma**2 * T * (2 * n_steps + 1) / (6 * (n_steps + 1))
+    mu = np.log(S) + (r - q - 0.5 * sigma**2) * T / 2
+    vol = np.sqrt(var)
+    d1 = (mu - np.log(K) + var) / vol
+    d2 = d1 - vol
+    forward = np.exp(mu + 0.5 * var)
+    phi = _sign(option_type)
+    price = np.exp(-r * T) * phi * (
+        forward * norm_cdf(phi * d1) - K * norm_cdf(phi * d2)
+    )
+    return price[()]
+
+
+def floating_lookback_price(
+    S, T, r, sigma, q=0, option_type="call", extremum=None, monitoring_dates=None
+):
+    """
+    Goldman-Sosin-Gatto floating-strike lookback.
+
+    The call pays S_T - min(S) and the put max(S) - S_T. `extremum` is the
+    minimum (call) or maximum (put) observed so far and defaults to S.
+    """
+    S = np.asarray(S, dtype=float)
+    extremum = S if extremum is None else np.asarray(extremum, dtype=float)
+    phi = _sign(option_type)
+    # The formula divides by the carry, so nudge it away from zero
+    b = r - q
+    b = np.where(np.abs(b) < 1e-8, 1e-8, b)
+    sqrt_T = np.sqrt(T)
+    a1 = (np.log(S / extremum) + (b + 0.5 * sigma**2) * T) / (sigma * sqrt_T)
+    a2 = a1 - sigma * sqrt_T
+    spot_pv = S * np.exp(-q * T)
+    vanilla = phi * (
+        spot_pv * norm_cdf(phi * a1) - extremum * np.exp(-r * T) * norm_cdf(phi * a2)
+    )
+    reflection = S * np.exp(-r * T) * sigma**2 / (2 * b) * phi * (
+        (S / extremum) ** (-2 * b / sigma**2)
+        * norm_cdf(-phi * (a1 - 2 * b * sqrt_T / sigma))
+        - np.exp(b * T) * norm_cdf(-phi * a1)
+    )
+    price = vanilla + reflection
+    if monitoring_dates is not None:
+        # The discrete extremum is the continuous one pulled inwards by the
+        # BGK factor; e^{-rT} E[extremum] = spot_pv +/- price
+        shift = bgk_shift(sigma, T, monitoring_dates)
+        extremum_pv = spot_pv - phi * price
+        price = price - phi * (shift**phi - 1) * extremum_pv
+    return price[()]
+
+
+def barrier_price(
+    S,
+    K,
+    T,
+    r,
+    sigma,
+    q=0,
+    barrier_level=None,
+    barrier_type="down-and-out",
+    option_type="call",
+    rebate=0.0,
+    monitoring_dates=None,
+):
+    """
+    Reiner-Rubinstein single barrier price.
+
+    Knock-out rebates are paid when the barrier is hit and knock-in
+    rebates at expiry if it never is. With monitoring_dates the barrier is
+    shifted away from the spot by the BGK factor. Contracts whose spot is
+    already through the barrier are priced as knocked out or in.
+    """
+    if barrier_type not in BARRIER_TYPES:
+        raise ValueError(f"barrier_type must be one of {BARRIER_TYPES}")
+    S, K, T, H = (np.asarray(a, dtype=float) for a in (S, K, T, barrier_level))
+    down = barrier_type.startswith("down")
+    knocked = S <= H if down else S >= H
+    if monitoring_dates is not None:
+        shift = bgk_shift(sigma, T, monitoring_dates)
+        H = H / shift if down else H * shift
+
+    phi = _sign(option_type)
+    eta = 1.0 if down else -1.0
+    b = r - q
+    vol = sigma * np.sqrt(T)
+    mu = (b - 0.5 * sigma**2) / sigma**2
+    lam = np.sqrt(mu**2 + 2 * r / sigma**2)
+    spot_pv = S * np.exp((b - r) * T)
+    strike_pv = K * np.exp(-r * T)
+    h_s = H / S
+
+    x1 = np.log(S / K) / vol + (1 + mu) * vol
+    x2 = np.log(S / H) / vol + (1 + mu) * vol
+    y1 = np.log(H**2 / (S * K)) / vol + (1 + mu) * vol
+    y2 = np.log(H / S) / vol + (1 + mu) * vol
+    z = np.log(H / S) / vol + lam * vol
+
+    A = phi * spot_pv * norm_cdf(phi * x1) - phi * strike_pv * norm_cdf(phi * (x1 - vol))
+    B = phi * spot_pv * norm_cdf(phi * x2) - phi * strike_pv * norm_cdf(phi * (x2 - vol))
+    C = phi * spot_pv * h_s ** (2 * (mu + 1)) * norm_cdf(
+        eta * y1
+    ) - phi * strike_pv * h_s ** (2 * mu) * norm_cdf(eta * (y1 - vol))
+    D = phi * spot_pv * h_s ** (2 * (mu + 1)) * norm_cdf(
+        eta * y2
+    ) - phi * strike_pv * h_s ** (2 * mu) * norm_cdf(eta * (y2 - vol))
+    E = rebate * np.exp(-r * T) * (
+        norm_cdf(eta * (x2 - vol)) - h_s ** (2 * mu) * norm_cdf(eta * (y2 - vol))
+    )
+    F = rebate * (
+        h_s ** (mu + lam) * norm_cdf(eta * z)
+        + h_s ** (mu - lam) * norm_cdf(eta * (z - 2 * lam * vol))
+    )
+
+    # Which combination applies depends on whether the strike is above
+    # or below the barrier
+    call = phi > 0
+    above = K > H
+    if barrier_type == "down-and-in":
+        price = np.where(call, np.where(above, C, A - B + D), np.where(above, B - C + D, A)) + E
+    elif barrier_type == "up-and-in":
+        price = np.where(call, np.where(above, A, B - C + D), np.where(above, A - B + D, C)) + E
+    elif barrier_type == "down-and-out":
+        price = np.where(call, np.where(above, A - C, B - D), np.where(above, A - B + C - D, 0.0)) + F
+    else:
+        price = np.where(call, np.where(above, 0.0, A - B + C - D), np.where(above, B - D, A - C)) + F
+
+    if barrier_type.endswith("-out"):
+        price = np.where(knocked, rebate, price)
+    else:
+        price = np.where(knocked, A, price)
+    return np.maximum(price, 0.0)[()]
+
+
+class ExoticAnalyticModel:
+    """
+    Closed-form counterparts of the MonteCarloModel exotics.
+
+    Parameters:
+        S: Current stock price
+        K: Strike price
+        T: Time to expiration (in years)
+        r: Risk-free interest rate (annual)
+        sigma: Volatility (annual)
+        q: Dividend yield (annual)
+        n_steps: Monitoring dates for the discrete prices (None: continuous)
+    """
+
+    def __init__(self, S, K, T, r, sigma, q=0, n_steps=252):
+        self.S = S
+        self.K = K
+        self.T = max(T, 1e-10)
+        self.r = r
+        self.sigma = max(sigma, 1e-10)
+        self.q = q
+        self.n_steps = n_steps
+
+    def get_results(self, option_type="call"):
+        barrier_type = "down-and-out" if option_type == "call" else "up-and-out"
+        barrier_level = self.S * 0.9 if "down" in barrier_type else self.S * 1.1
+        args = (self.S, self.K, self.T, self.r, self.sigma, self.q)
+        lookback_args = (self.S, self.T, self.r, self.sigma, self.q, option_type)
+        barrier_args = args + (barrier_level, barrier_type, option_type)
+        return {
+            "monitoring_dates": self.n_steps,
+            "asian_geometric": {
+                "price": float(geometric_asian_price(*args, self.n_steps, option_type)),
+                "continuous_price": float(
+                    geometric_asian_price(*args, None, option_type)
+                ),
+            },
+            "lookback": {
+                "price": float(
+                    floating_lookback_price(
+                        *lookback_args, monitoring_dates=self.n_steps
+                    )
+                ),
+                "continuous_price": float(floating_lookback_price(*lookback_args)),
+            },
+            "barrier": {
+                "price": float(
+                    barrier_price(*barrier_args, monitoring_dates=self.n_steps)
+                ),
+                "continuous_price": float(barrier_price(*barrier_args)),
+                "barrier_type": barrier_type,
+                "barrier_level": float(barrier_level),
+            },
+        }
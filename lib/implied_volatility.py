@@ -0,0 +1,219 @@
+"""
+Implied Volatility
+
+Vectorized inversion of the Black-Scholes-Merton formula for whole option
+chains. Every contract is solved simultaneously with a safeguarded Newton
+iteration: Newton steps are taken while vega is healthy and the step stays
+inside the current volatility bracket, otherwise the contract falls back to
+bisection of that bracket.
+"""
+
+import numpy as np
+
+from lib.pricing_models import BatchBlackScholesModel
+
+CONVERGED = "converged"
+MAX_ITERATIONS = "max_iterations"
+BELOW_INTRINSIC = "below_intrinsic"
+ABOVE_MAXIMUM = "above_maximum"
+OUT_OF_BRACKET = "out_of_bracket"
+FLAT_VEGA = "flat_vega"
+
+# Quotes whose price cannot resolve sigma more finely than this are
+# reported as flat_vega instead of converged
+MAX_SIGMA_RESOLUTION = 1e-4
+INVALID_QUOTE = "invalid_quote"
+
+
+class ImpliedVolatilitySolver:
+    """
+    Implied volatility solver for arrays of option quotes.
+
+    Contract terms are fixed on construction; `solve` can then be called
+    with any number of price arrays (bid, ask, mid, last) for the same
+    contracts.
+
+    Parameters:
+        S: Spot price(s)
+        K: Strike price(s)
+        T: Time(s) to expiry (years)
+        r: Risk-free rate(s)
+        q: Dividend yield(s)
+        option_type: "call"/"put", or an array of them
+        tol: Convergence tolerance, as a fraction of the quote and in
+            volatility units (price error / vega)
+        max_iter: Maximum number of iterations
+        sigma_bounds: Initial (low, high) volatility bracket
+    """
+
+    def __init__(
+        self,
+        S,
+        K,
+        T,
+        r,
+        q=0,
+        option_type="call",
+        tol=1e-8,
+        max_iter=100,
+        sigma_bounds=(1e-4, 5.0),
+    ):
+        arrays = np.broadcast_arrays(
+            np.asarray(S, dtype=float),
+            np.asarray(K, dtype=float),
+            np.maximum(np.asarray(T, dtype=float), 1e-10),
+            np.asarray(r, dtype=float),
+            np.asarray(q, dtype=float),
+            BatchBlackScholesModel._is_call(option_type),
+        )
+        self.shape = arrays[0].shape
+        # Contracts are solved as flat vectors and reshaped on return
+        self.S, self.K, self.T, self.r, self.q, self.is_call = (
+            a.ravel() for a in arrays
+        )
+        self.tol = tol
+        self.max_iter = max_iter
+        self.sigma_bounds = sigma_bounds
+
+        spot_pv = self.S * np.exp(-self.q * self.T)
+        strike_pv = self.K * np.exp(-self.r * self.T)
+        self.lower_bound = np.where(
+            self.is_call,
+            np.maximum(spot_pv - strike_pv, 0),
+            np.maximum(strike_pv - spot_pv, 0),
+        )
+        self.upper_bound = np.where(self.is_call, spot_pv, strike_pv)
+
+    def _initial_guess(self, idx, prices):
+        """Corrado-Miller approximation, expressed in forward terms."""
+        S, K, T = self.S[idx], self.K[idx], self.T[idx]
+        forward = S * np.exp((self.r[idx] - self.q[idx]) * T)
+        # Convert puts to calls through put-call parity
+        call = prices * np.exp(self.r[idx] * T) + np.where(
+            self.is_call[idx], 0.0, forward - K
+        )
+        half_gap = 0.5 * (forward - K)
+        inner = (call - half_gap) ** 2 - (forward - K) ** 2 / np.pi
+        total_vol = (
+            np.sqrt(2 * np.pi)
+            / (forward + K)
+            * (call - half_gap + np.sqrt(np.maximum(inner, 0)))
+        )
+        low, high = self.sigma_bounds
+        guess = np.nan_to_num(total_vol / np.sqrt(T), nan=0.3)
+        return np.clip(guess, 2 * low, 0.5 * high)
+
+    def _price_and_vega(self, idx, sigma):
+        model = BatchBlackScholesModel(
+            self.S[idx],
+            self.K[idx],
+            self.T[idx],
+            self.r[idx],
+            sigma,
+            self.q[idx],
+            self.is_call[idx],
+        )
+        results = model.get_results()
+        return results["price"], results["greeks"]["vega"] * 100
+
+    def solve(self, prices):
+        """
+        Invert an array of option prices.
+
+        prices broadcasts against the contracts, so one contract can be
+        solved for a whole array of quotes. Returns a dict of arrays:
+        implied_volatility (NaN where no solution exists), converged,
+        iterations and a per-quote status string.
+        """
+        prices = np.asarray(prices, dtype=float)
+        shape = np.broadcast_shapes(self.shape, prices.shape)
+        prices = np.broadcast_to(prices, shape).ravel()
+        # Contract index of every quote
+        contract = np.broadcast_to(
+            np.arange(self.S.size).reshape(self.shape), shape
+        ).ravel()
+        lower_bound = self.lower_bound[contract]
+        upper_bound = self.upper_bound[contract]
+
+        sigma = np.full(prices.shape, np.nan)
+        iterations = np.zeros(prices.shape, dtype=int)
+        status = np.full(prices.shape, MAX_ITERATIONS, dtype=object)
+
+        invalid = ~np.isfinite(prices) | (prices <= 0)
+        below = ~invalid & (prices < lower_bound * (1 - self.tol))
+        above = ~invalid & (prices >= upper_bound)
+        status[invalid] = INVALID_QUOTE
+        status[below] = BELOW_INTRINSIC
+        status[above] = ABOVE_MAXIMUM
+
+        active = np.flatnonzero(~(invalid | below | above))
+        target = prices[active]
+        low = np.full(active.shape, self.sigma_bounds[0])
+        high = np.full(active.shape, self.sigma_bounds[1])
+        guess = self._initial_guess(contract[active], target)
+
+        for iteration in range(1, self.max_iter + 1):
+            if active.size == 0:
+                break
+            price, vega = self._price_and_vega(contract[active], guess)
+            diff = price - target
+            # Scaled by the quote and by vega, so neither tiny quotes nor
+            # quotes that barely move with sigma are matched by any sigma
+            done = np.abs(diff) <= self.tol * np.minimum(target, vega)
+            # Smallest sigma change that moves the price by one rounding
+            # step; above MAX_SIGMA_RESOLUTION the match is a coincidence of
+            # floating point rather than an identified volatility
+            with np.errstate(divide="ignore", invalid="ignore"):
+                resolution = np.finfo(float).eps * target / vega
+            flat = done & ~(resolution <= MAX_SIGMA_RESOLUTION)
+            done &= ~flat
+            iterations[active] = iteration
+            sigma[active[done]] = guess[done]
+            status[active[done]] = CONVERGED
+            status[active[flat]] = FLAT_VEGA
+
+            # Price is increasing in sigma, so the sign of diff moves the bracket
+            high = np.where(diff > 0, guess, high)
+            low = np.where(diff < 0, guess, low)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                newton = guess - diff / vega
+            use_newton = (vega > 1e-8) & (newton > low) & (newton < high)
+            guess = np.where(use_newton, newton, 0.5 * (low + high))
+
+            # A bracket collapsed onto a bound that never moved means the
+            # quote needs a sigma outside sigma_bounds; one collapsed inside
+            # the bounds without passing the tolerance means the price is
+            # flat in sigma to machine precision, so sigma is not identified
+            stalled = ~done & ((high - low) < 1e-12)
+            outside = stalled & (
+                (high == self.sigma_bounds[1]) | (low == self.sigma_bounds[0])
+            )
+            status[active[outside]] = OUT_OF_BRACKET
+            status[active[stalled & ~outside]] = FLAT_VEGA
+
+            keep = ~(done | flat | stalled)
+            active, target = active[keep], target[keep]
+            low, high, guess = low[keep], high[keep], guess[keep]
+
+        return {
+            "implied_volatility": sigma.reshape(shape),
+            "converged": (status == CONVERGED).reshape(shape),
+            "iterations": iterations.reshape(shape),
+            "status": status.reshape(shape),
+        }
+
+    def solve_quotes(self, bid, ask):
+        """Implied volatilities for the bid, ask and mid of each quote."""
+        bid = np.asarray(bid, dtype=float)
+        ask = np.asarray(ask, dtype=float)
+        return {
+            "bid": self.solve(bid),
+            "ask": self.solve(ask),
+            "mid": self.solve(0.5 * (bid + ask)),
+        }
+
+
+def implied_volatility(prices, S, K, T, r, q=0, option_type="call", **kwargs):
+    """Convenience wrapper returning only the implied volatility array."""
+    solver = ImpliedVolatilitySolver(S, K, T, r, q, option_type, **kwargs)
+    return solver.solve(prices)["implied_volatility"]
@@ -0,0 +1,174 @@
+"""
+Market Data Cache
+
+Process-wide cache for upstream market data with a time-to-live per field:
+spot prices go stale in seconds, historical volatility in hours and
+company info in a day. Lookups are single-flight: when several requests
+miss on the same ticker and field at once, one of them calls upstream and
+the others wait for its result instead of issuing duplicate calls.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds each field stays valid
+DEFAULT_TTLS = {
+    "spot": 15.0,
+    "volatility": 4 * 3600.0,
+    "info": 24 * 3600.0,
+    "risk_free_rate": 3600.0,
+    "expiries": 3600.0,
+}
+
+
+class _Flight:
+    """An upstream call in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class MarketDataCache:
+    """
+    Per-field TTL cache with request coalescing.
+
+    Parameters:
+        ttls: Field -> seconds overrides of DEFAULT_TTLS
+        default_ttl: Seconds for fields without a configured TTL
+        max_entries: Maximum number of cached (ticker, field) values
+        clock: Monotonic time source
+    """
+
+    def __init__(
+        self, ttls=None, default_ttl=60.0, max_entries=4096, clock=time.monotonic
+    ):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counts = {}
+        self.evictions = 0
+
+    def ttl(self, field):
+        return self.ttls.get(field, self.default_ttl)
+
+    def _count(self, field, outcome):
+        counts = self._counts.setdefault(
+            field, {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+        )
+        counts[outcome] += 1
+
+    def get(self, ticker, field):
+        """Cached value of `field` for `ticker`, or None if absent or expired."""
+        key = (ticker, field)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                self._count(field, "misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count(field, "hits")
+            return copy.deepcopy(entry[1])
+
+    def get_or_fetch(self, ticker, field, fetch):
+        """
+        Cached value of `field` for `ticker`, calling fetch() on a miss.
+
+        Concurrent misses on the same key share a single fetch() call.
+        Errors are passed to every waiting caller and are not cached.
+        """
+        key = (ticker, field)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self._count(field, "hits")
+                return copy.deepcopy(entry[1])
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._count(field, "misses")
+            else:
+                self._count(field, "coalesced")
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.value)
+
+        try:
+            flight.value = fetch()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._store(key, flight.value)
+                else:
+                    self._count(field, "errors")
+                del self._flights[key]
+            flight.done.set()
+        return copy.deepcopy(flight.value)
+
+    def _store(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl(key[1]), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, ticker, field, value):
+        with self._lock:
+            self._store((ticker, field), value)
+
+    def invalidate(self, ticker=None, field=None):
+        """Drop cached values matching ticker and/or field (all if neither)."""
+        with self._lock:
+            for key in list(self._entries):
+                if ticker in (None, key[0]) and field in (None, key[1]):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            fields = {}
+            totals = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+            for field, counts in self._counts.items():
+                # Coalesced callers were served without an upstream call
+                served = counts["hits"] + counts["coalesced"]
+                lookups = served + counts["misses"]
+                fields[field] = dict(
+                    counts,
+                    ttl=self.ttl(field),
+                    hit_ratio=served / lookups if lookups else 0.0,
+                )
+                for name in totals:
+                    totals[name] += counts[name]
+            served = totals["hits"] + totals["coalesced"]
+            lookups = served + totals["misses"]
+            return dict(
+                totals,
+                entries=len(self._entries),
+                max_entries=self.max_entries,
+                hit_ratio=served / lookups if lookups else 0.0,
+                evictions=self.evictions,
+                in_flight=len(self._flights),
+                fields=fields,
+            )
+
+
+# Shared by every MarketDataFetcher in the process
+market_data_cache = MarketDataCache()
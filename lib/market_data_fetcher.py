@@ -5,83 +5,282 @@ Fetches real-time and historical market data from Yahoo Finance via yfinance.
 Supports all global exchanges covered by Yahoo Finance.
 """
 
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import numpy as np
 import pandas as pd
 import yfinance as yf
 
+from lib.market_data_cache import market_data_cache
+from lib.price_store import PERIOD_OFFSETS, frame_to_bars, price_store
+
+# Fields returned by MarketDataFetcher.fetch_many
+BULK_FIELDS = ("spot", "volatility", "dividend_yield")
+
+
+def annualized_volatility(close):
+    """Annualized standard deviation of daily log returns."""
+    returns = np.diff(np.log(np.asarray(close, dtype=float)))
+    return float(returns.std(ddof=1) * np.sqrt(252))
+
+
+def _dividend_yield(info):
+    return float(info.get("dividendYield", 0) or 0)
+
+
+ORIENTS = ("records", "columns")
+
+# Options chain columns in output order: (name, kind, decimals)
+CHAIN_COLUMNS = (
+    ("strike", "float", 2),
+    ("lastPrice", "float", 4),
+    ("bid", "float", 4),
+    ("ask", "float", 4),
+    ("volume", "count", None),
+    ("openInterest", "count", None),
+    ("impliedVolatility", "float", 4),
+    ("inTheMoney", "flag", None),
+)
+
+
+def _check_orient(orient):
+    if orient not in ORIENTS:
+        raise ValueError(f"orient must be one of {ORIENTS}")
+
+
+def clean_floats(values, decimals=None):
+    """
+    Round a column of numbers to a JSON-ready list in one pass, with
+    None in place of NaN, infinities and unparseable values.
+    """
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    finite = np.isfinite(values)
+    if decimals is not None:
+        values = np.round(values, decimals)
+    out = values.astype(object)
+    out[~finite] = None
+    return out.tolist()
+
+
+def clean_counts(values):
+    """Integer column with missing values as 0."""
+    values = pd.to_numeric(pd.Series(values), errors="coerce")
+    return values.fillna(0).to_numpy(dtype=np.int64).tolist()
+
+
+def columns_to_records(columns):
+    """Turn a dict of equal-length column lists into a list of row dicts."""
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+
+class YahooFinanceSource:
+    """
+    Upstream calls made by MarketDataFetcher.fetch_many.
+
+    Any object with the same three methods can be passed in its place,
+    e.g. a stub serving recorded data.
+    """
+
+    def download(self, tickers, period="1y"):
+        """Daily history for several tickers in one request: ticker -> DataFrame."""
+        data = yf.download(
+            list(tickers),
+            period=period,
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=True,
+            threads=False,
+            progress=False,
+        )
+        frames = {}
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                df = data[ticker]
+            elif len(tickers) == 1:
+                df = data
+            else:
+                continue
+            df = df.dropna(how="all")
+            if not df.empty:
+                frames[ticker] = df
+        return frames
+
+    def history(self, ticker, period="1y"):
+        return yf.Ticker(ticker).history(period=period)
+
+    def info(self, ticker):
+        return yf.Ticker(ticker).info
+
+
+def _attempt(call, delay):
+    if delay:
+        time.sleep(delay)
+    return call()
+
+
+def _run_calls(executor, calls, max_workers, timeout, retries, backoff):
+    """
+    Run a dict of key -> callable on executor with a per-call timeout and
+    exponential-backoff retries. Returns (results, errors) dicts by key.
+
+    At most max_workers calls are in flight, so a call's timeout starts
+    when it starts rather than while it queues. A timed-out call cannot
+    be interrupted; it keeps its worker until it returns and its result
+    is discarded.
+    """
+    queue = [(key, 0) for key in calls]
+    queue.reverse()
+    pending, abandoned = {}, set()
+    results, errors = {}, {}
+    while queue or pending:
+        abandoned = {f for f in abandoned if not f.done()}
+        while queue and len(pending) + len(abandoned) < max_workers:
+            key, attempt = queue.pop()
+            delay = backoff * 2 ** (attempt - 1) if attempt else 0.0
+            future = executor.submit(_attempt, calls[key], delay)
+            pending[future] = (key, attempt, time.monotonic() + delay + timeout)
+        if not pending:
+            # Every worker is stuck on an abandoned call
+            wait(abandoned, return_when=FIRST_COMPLETED)
+            continue
+        next_deadline = min(deadline for _, _, deadline in pending.values())
+        done, _ = wait(
+            pending,
+            timeout=max(next_deadline - time.monotonic(), 0.0),
+            return_when=FIRST_COMPLETED,
+        )
+        now = time.monotonic()
+        for future, (key, attempt, deadline) in list(pending.items()):
+            if future in done:
+                error = future.exception()
+                if error is None:
+                    results[key] = future.result()
+                    del pending[future]
+                    continue
+            elif now >= deadline:
+                if not future.cancel():
+                    abandoned.add(future)
+                error = TimeoutError(f"Timed out after {timeout}s")
+            else:
+                continue
+            del pending[future]
+            if attempt < retries:
+                queue.append((key, attempt + 1))
+            else:
+                errors[key] = error
+    return results, errors
+
 
 def validate_ticker(ticker):
     """Validate a ticker symbol by attempting to fetch recent data."""
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="5d")
-        if hist.empty:
-            return False, None
-        return True, stock
+        fetcher = MarketDataFetcher(ticker)
+        fetcher.spot_price
+        return True, fetcher.stock
     except Exception:
         return False, None
 
 
 class MarketDataFetcher:
-    """Fetches and caches market data from Yahoo Finance."""
+    """
+    Fetches market data from Yahoo Finance.
 
-    def __init__(self, ticker):
+    Values are memoized on the instance, so one request sees a consistent
+    snapshot, and shared across instances through a process-wide
+    MarketDataCache with per-field expiry. Daily bars come from the local
+    PriceStore, which only downloads the days it has not seen yet.
+    """
+
+    def __init__(self, ticker, cache=None, store=None):
         self.ticker = ticker
         self.stock = yf.Ticker(ticker)
+        self.cache = market_data_cache if cache is None else cache
+        self.store = price_store if store is None else store
         self._spot_price = None
         self._volatility = None
         self._dividend_yield = None
+        self._risk_free_rate = None
         self._info = None
 
     def _get_info(self):
         if self._info is None:
             try:
-                self._info = self.stock.info
+                self._info = self.cache.get_or_fetch(
+                    self.ticker, "info", lambda: self.stock.info
+                )
             except Exception:
                 self._info = {}
         return self._info
 
+    def _fetch_spot_price(self):
+        hist = self.stock.history(period="5d")
+        if hist.empty:
+            raise ValueError(f"No price data available for {self.ticker}")
+        return float(hist["Close"].iloc[-1])
+
     @property
     def spot_price(self):
         if self._spot_price is None:
-            hist = self.stock.history(period="5d")
-            if hist.empty:
-                raise ValueError(f"No price data available for {self.ticker}")
-            self._spot_price = float(hist["Close"].iloc[-1])
+            self._spot_price = self.cache.get_or_fetch(
+                self.ticker, "spot", self._fetch_spot_price
+            )
         return self._spot_price
 
+    def _daily_bars(self, period):
+        """Daily bars over period, from the store when it is usable."""
+        try:
+            return self.store.period(self.ticker, period)
+        except OSError:
+            # Store directory not writable: go straight to Yahoo Finance
+            return frame_to_bars(self.stock.history(period=period))
+
+    def _fetch_volatility(self):
+        close = self._daily_bars("1y")["close"]
+        if len(close) < 10:
+            raise ValueError(
+                f"Insufficient historical data for {self.ticker}"
+            )
+        return annualized_volatility(close)
+
     @property
     def historical_volatility(self):
         if self._volatility is None:
-            hist = self.stock.history(period="1y")
-            if hist.empty or len(hist) < 10:
-                raise ValueError(
-                    f"Insufficient historical data for {self.ticker}"
-                )
-            returns = np.log(hist["Close"] / hist["Close"].shift(1)).dropna()
-            self._volatility = float(returns.std() * np.sqrt(252))
+            self._volatility = self.cache.get_or_fetch(
+                self.ticker, "volatility", self._fetch_volatility
+            )
         return self._volatility
 
     @property
     def dividend_yield(self):
         if self._dividend_yield is None:
             try:
-                info = self._get_info()
-                self._dividend_yield = float(info.get("dividendYield", 0) or 0)
+                self._dividend_yield = _dividend_yield(self._get_info())
             except Exception:
                 self._dividend_yield = 0.0
         return self._dividend_yield
 
+    @staticmethod
+    def _fetch_risk_free_rate():
+        hist = yf.Ticker("^IRX").history(period="5d")
+        if hist.empty:
+            raise ValueError("No data for ^IRX")
+        return float(hist["Close"].iloc[-1] / 100)
+
     def get_risk_free_rate(self):
         """Fetch risk-free rate from 13-week Treasury Bill."""
-        try:
-            treasury = yf.Ticker("^IRX")
-            hist = treasury.history(period="5d")
-            if not hist.empty:
-                return float(hist["Close"].iloc[-1] / 100)
-        except Exception:
-            pass
-        return 0.05  # Default fallback
+        if self._risk_free_rate is None:
+            try:
+                self._risk_free_rate = self.cache.get_or_fetch(
+                    "^IRX", "risk_free_rate", self._fetch_risk_free_rate
+                )
+            except Exception:
+                # Default fallback; not cached, so the next request retries
+                self._risk_free_rate = 0.05
+        return self._risk_free_rate
 
     def get_stock_info(self):
         """Get summary info about the stock."""
@@ -100,35 +299,175 @@ class MarketDataFetcher:
             "risk_free_rate": self.get_risk_free_rate(),
         }
 
-    def get_historical_data(self, period="1y", interval="1d"):
-        """Get historical OHLCV data."""
-        hist = self.stock.history(period=period, interval=interval)
-        if hist.empty:
-            return []
-        hist.index = hist.index.tz_localize(None)
-        records = []
-        for date, row in hist.iterrows():
-            records.append(
-                {
-                    "date": date.strftime("%Y-%m-%d"),
-                    "open": round(float(row["Open"]), 2),
-                    "high": round(float(row["High"]), 2),
-                    "low": round(float(row["Low"]), 2),
-                    "close": round(float(row["Close"]), 2),
-                    "volume": int(row["Volume"]),
-                }
+    @classmethod
+    def fetch_many(
+        cls,
+        tickers,
+        fields=BULK_FIELDS,
+        source=None,
+        cache=None,
+        max_workers=8,
+        group_size=100,
+        timeout=30.0,
+        retries=2,
+        backoff=0.5,
+    ):
+        """
+        Spot, volatility and dividend yield for many tickers at once.
+
+        Values still in the market data cache are used as they are. Spot
+        and volatility for the rest come from grouped one-year downloads
+        of `group_size` tickers; tickers missing from their group and the
+        info lookups behind the dividend yield are fetched one by one.
+        All upstream calls run on a pool of `max_workers` threads with a
+        per-call timeout and `retries` retries. Fetched values go back
+        into the cache.
+
+        Returns a DataFrame indexed by ticker with one column per field
+        and an "error" column (None where every field was fetched).
+        """
+        unknown = set(fields) - set(BULK_FIELDS)
+        if unknown:
+            raise ValueError(f"fields must be a subset of {BULK_FIELDS}")
+        source = YahooFinanceSource() if source is None else source
+        cache = market_data_cache if cache is None else cache
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers))
+        values = {ticker: {} for ticker in tickers}
+        failures = {ticker: [] for ticker in tickers}
+
+        history_fields = [f for f in fields if f in ("spot", "volatility")]
+        need_history, need_info = [], []
+        for ticker in tickers:
+            for field in history_fields:
+                cached = cache.get(ticker, field)
+                if cached is not None:
+                    values[ticker][field] = cached
+            if len(values[ticker]) < len(history_fields):
+                need_history.append(ticker)
+            if "dividend_yield" in fields:
+                info = cache.get(ticker, "info")
+                if info is None:
+                    need_info.append(ticker)
+                else:
+                    values[ticker]["dividend_yield"] = _dividend_yield(info)
+
+        def record_history(ticker, df):
+            close = df["Close"].dropna().to_numpy(dtype=float)
+            if len(close) == 0:
+                raise ValueError(f"No price data available for {ticker}")
+            fetched = {"spot": float(close[-1])}
+            if len(close) >= 10:
+                fetched["volatility"] = annualized_volatility(close)
+            for field in history_fields:
+                if field not in fetched:
+                    failures[ticker].append(
+                        f"{field}: insufficient historical data"
+                    )
+                elif field not in values[ticker]:
+                    values[ticker][field] = fetched[field]
+                    cache.put(ticker, field, fetched[field])
+
+        def info_call(ticker):
+            return lambda: cache.get_or_fetch(
+                ticker, "info", lambda: source.info(ticker)
             )
-        return records
+
+        def history_call(ticker):
+            return lambda: source.history(ticker, period="1y")
+
+        def download_call(chunk):
+            return lambda: source.download(chunk, period="1y")
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            run = (max_workers, timeout, retries, backoff)
+            calls = {}
+            for i in range(0, len(need_history), group_size):
+                calls[("download", i)] = download_call(need_history[i : i + group_size])
+            # A failed group is not fatal: its tickers are retried one by one
+            results, _ = _run_calls(executor, calls, *run)
+
+            # Per-ticker fallbacks for whatever the grouped downloads missed
+            downloaded = {}
+            for frames in results.values():
+                downloaded.update(frames)
+            calls = {}
+            for ticker in need_history:
+                if ticker in downloaded:
+                    try:
+                        record_history(ticker, downloaded[ticker])
+                    except Exception as e:
+                        failures[ticker].append(str(e))
+                else:
+                    calls[("history", ticker)] = history_call(ticker)
+            for ticker in need_info:
+                calls[("info", ticker)] = info_call(ticker)
+            results, errors = _run_calls(executor, calls, *run)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        for (kind, ticker), result in results.items():
+            try:
+                if kind == "history":
+                    if result is None or result.empty:
+                        raise ValueError(f"No price data available for {ticker}")
+                    record_history(ticker, result)
+                else:
+                    values[ticker]["dividend_yield"] = _dividend_yield(result or {})
+            except Exception as e:
+                failures[ticker].append(str(e))
+        for (kind, ticker), error in errors.items():
+            failures[ticker].append(f"{kind}: {error}")
+
+        rows = []
+        for ticker in tickers:
+            row = {field: values[ticker].get(field) for field in fields}
+            row["error"] = "; ".join(failures[ticker]) or None
+            rows.append(row)
+        return pd.DataFrame(rows, index=pd.Index(tickers, name="ticker"))
+
+    def get_historical_data(self, period="1y", interval="1d", orient="records"):
+        """
+        Get historical OHLCV data, as a list of daily records or, with
+        orient="columns", a dict of column lists.
+        """
+        _check_orient(orient)
+        if interval == "1d" and period in PERIOD_OFFSETS:
+            bars = self._daily_bars(period)
+        else:
+            bars = frame_to_bars(self.stock.history(period=period, interval=interval))
+        columns = {
+            "date": bars["date"].astype(str).tolist(),
+            "open": clean_floats(bars["open"], 2),
+            "high": clean_floats(bars["high"], 2),
+            "low": clean_floats(bars["low"], 2),
+            "close": clean_floats(bars["close"], 2),
+            "volume": np.asarray(bars["volume"]).tolist(),
+        }
+        if orient == "columns":
+            return columns
+        return columns_to_records(columns)
 
     def get_options_expiries(self):
         """Get available option expiry dates."""
         try:
-            return list(self.stock.options)
+            return self.cache.get_or_fetch(
+                self.ticker, "expiries", lambda: list(self.stock.options)
+            )
         except Exception:
             return []
 
-    def get_options_chain(self, expiry=None):
-        """Get the full options chain for a given expiry."""
+    def get_options_chain(self, expiry=None, model_iv=False, orient="records"):
+        """
+        Get the full options chain for a given expiry.
+
+        With model_iv=True each contract also carries an implied volatility
+        inverted from its bid/ask mid (falling back to the last price)
+        instead of relying solely on Yahoo's impliedVolatility column.
+        orient="columns" returns calls and puts as dicts of column lists
+        instead of lists of contracts.
+        """
+        _check_orient(orient)
         try:
             expiries = self.get_options_expiries()
             if not expiries:
@@ -136,8 +475,15 @@ class MarketDataFetcher:
             if expiry is None or expiry not in expiries:
                 expiry = expiries[0]
             chain = self.stock.option_chain(expiry)
-            calls = self._chain_to_records(chain.calls)
-            puts = self._chain_to_records(chain.puts)
+            calls_df, puts_df = chain.calls, chain.puts
+            if model_iv:
+                calls_df = self._add_model_iv(calls_df, expiry, "call")
+                puts_df = self._add_model_iv(puts_df, expiry, "put")
+            convert = (
+                self._chain_to_columns if orient == "columns" else self._chain_to_records
+            )
+            calls = convert(calls_df)
+            puts = convert(puts_df)
             return {
                 "expiries": expiries,
                 "selected_expiry": expiry,
@@ -152,35 +498,57 @@ class MarketDataFetcher:
                 "error": str(e),
             }
 
-    def _safe_float(self, val, decimals=None):
-        """Safely convert value to float, handling NaN/Inf."""
-        try:
-            if val is None:
-                return None
-            f_val = float(val)
-            if np.isnan(f_val) or np.isinf(f_val):
-                return None
-            if decimals is not None:
-                return round(f_val, decimals)
-            return f_val
-        except (ValueError, TypeError):
-            return None
+    def _add_model_iv(self, df, expiry, option_type):
+        """Invert mid quotes of a chain DataFrame to implied volatilities."""
+        from lib.implied_volatility import ImpliedVolatilitySolver
+
+        if df is None or df.empty:
+            return df
+        days = (pd.Timestamp(expiry) - pd.Timestamp.today().normalize()).days
+        T = max(days, 1) / 365
+        bid = df["bid"].to_numpy(dtype=float)
+        ask = df["ask"].to_numpy(dtype=float)
+        mid = np.where((bid > 0) & (ask > 0), 0.5 * (bid + ask), np.nan)
+        mid = np.where(np.isnan(mid), df["lastPrice"].to_numpy(dtype=float), mid)
+        solver = ImpliedVolatilitySolver(
+            self.spot_price,
+            df["strike"].to_numpy(dtype=float),
+            T,
+            self.get_risk_free_rate(),
+            self.dividend_yield,
+            option_type,
+        )
+        result = solver.solve(mid)
+        df = df.copy()
+        df["modelImpliedVolatility"] = result["implied_volatility"]
+        df["modelIvStatus"] = result["status"]
+        return df
+
+    def _chain_to_columns(self, df):
+        """Convert an options chain DataFrame to a dict of cleaned columns."""
+        if df is None or df.empty:
+            df = pd.DataFrame()
+
+        def column(name):
+            return df[name] if name in df else pd.Series([np.nan] * len(df))
+
+        columns = {}
+        for name, kind, decimals in CHAIN_COLUMNS:
+            if kind == "float":
+                columns[name] = clean_floats(column(name), decimals)
+            elif kind == "count":
+                columns[name] = clean_counts(column(name))
+            else:
+                columns[name] = column(name).fillna(False).astype(bool).tolist()
+        if "modelImpliedVolatility" in df:
+            columns["modelImpliedVolatility"] = clean_floats(
+                df["modelImpliedVolatility"], 4
+            )
+            columns["modelIvStatus"] = df["modelIvStatus"].tolist()
+        return columns
 
     def _chain_to_records(self, df):
         """Convert an options chain DataFrame to a list of dicts."""
         if df is None or df.empty:
             return []
-        records = []
-        for _, row in df.iterrows():
-            record = {
-                "strike": self._safe_float(row.get("strike"), 2),
-                "lastPrice": self._safe_float(row.get("lastPrice"), 4),
-                "bid": self._safe_float(row.get("bid"), 4),
-                "ask": self._safe_float(row.get("ask"), 4),
-                "volume": int(row.get("volume", 0)) if pd.notna(row.get("volume")) else 0,
-                "openInterest": int(row.get("openInterest", 0)) if pd.notna(row.get("openInterest")) else 0,
-                "impliedVolatility": self._safe_float(row.get("impliedVolatility"), 4),
-                "inTheMoney": bool(row.get("inTheMoney", False)),
-            }
-            records.append(record)
-        return records
+        return columns_to_records(self._chain_to_columns(df))
@@ -0,0 +1,261 @@
+"""
+Historical Price Store
+
+Local columnar store for daily OHLCV bars. Each ticker is one NumPy
+structured array on disk, read back memory-mapped so column slices are
+views of the file rather than copies. Updates only download the bars
+after the last stored date and rewrite the file atomically, so readers
+never see a partially written store.
+
+Yahoo Finance bars are split- and dividend-adjusted as of the day they
+are fetched, so a corporate action rebases the whole history. Each update
+refetches the last completed stored bar. If its close no longer matches,
+the stored range is downloaded again rather than appending a tail that is
+on a different adjustment basis.
+
+The directory defaults to $OPTION_PRICER_PRICE_STORE, or a folder in the
+system temp directory. The first download covers INITIAL_PERIOD, and a
+request for an earlier start extends the stored history backwards. With
+offline=True the store never goes upstream, which allows working against
+a previously recorded dataset.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+BAR_DTYPE = np.dtype(
+    [
+        ("date", "datetime64[D]"),
+        ("open", "f8"),
+        ("high", "f8"),
+        ("low", "f8"),
+        ("close", "f8"),
+        ("volume", "i8"),
+    ]
+)
+
+# Lookback of the first download for a ticker: one-year volatility and
+# the default chart periods fit inside it; longer periods extend the store
+# on demand
+INITIAL_PERIOD = "2y"
+
+EXTEND_SLACK = np.timedelta64(7, "D")
+
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+def default_directory():
+    return os.environ.get(
+        "OPTION_PRICER_PRICE_STORE",
+        os.path.join(tempfile.gettempdir(), "option-pricer-prices"),
+    )
+
+
+def yfinance_source(ticker, start=None):
+    """Daily bars from Yahoo Finance, from `start` or over INITIAL_PERIOD."""
+    import yfinance as yf
+
+    stock = yf.Ticker(ticker)
+    if start is None:
+        return stock.history(period=INITIAL_PERIOD, interval="1d")
+    return stock.history(start=start, interval="1d")
+
+
+def frame_to_bars(df):
+    """Convert a yfinance history DataFrame to a BAR_DTYPE array."""
+    if df is None or df.empty:
+        return np.empty(0, dtype=BAR_DTYPE)
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars["date"] = index.values.astype("datetime64[D]")
+    for column in ("open", "high", "low", "close"):
+        bars[column] = df[column.capitalize()].to_numpy(dtype=float)
+    bars["volume"] = df["Volume"].fillna(0).to_numpy(dtype=np.int64)
+    return bars
+
+
+class PriceStore:
+    """
+    Per-ticker OHLCV store with incremental updates.
+
+    Parameters:
+        directory: Store location (default: default_directory())
+        source: Callable (ticker, start) -> history DataFrame; start is a
+            date string or None for the initial download
+        refresh_interval: Seconds before a stored ticker is checked for
+            new bars again
+        offline: Never fetch; serve only what is already stored
+    """
+
+    def __init__(
+        self, directory=None, source=None, refresh_interval=3600.0, offline=False
+    ):
+        self.directory = directory or default_directory()
+        self.source = source or yfinance_source
+        self.refresh_interval = refresh_interval
+        self.offline = offline
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        # Tickers whose upstream history starts at the first stored bar
+        self._complete = set()
+
+    def _path(self, ticker):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in ticker)
+        return os.path.join(self.directory, f"{safe}.npy")
+
+    def _lock(self, ticker):
+        with self._locks_lock:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def read(self, ticker):
+        """Stored bars as a read-only memory map, or None if absent."""
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
+
+    def write(self, ticker, bars):
+        """Replace the stored bars for ticker."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(ticker)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.asarray(bars, dtype=BAR_DTYPE))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _stale(self, ticker):
+        try:
+            age = time.time() - os.path.getmtime(self._path(ticker))
+        except OSError:
+            return True
+        return age > self.refresh_interval
+
+    def update(self, ticker, force=False):
+        """
+        Fetch bars newer than the last stored date and append them.
+
+        The last stored bar is fetched again, since it may have been
+        recorded intraday, along with the completed bar before it. If that
+        bar's close has changed, the prices were re-adjusted upstream and
+        the whole stored range is downloaded again. Returns the number of
+        bars added after the previously stored last date.
+        """
+        if self.offline:
+            return 0
+        with self._lock(ticker):
+            if not force and not self._stale(ticker):
+                return 0
+            stored = self.read(ticker)
+            if stored is None or len(stored) == 0:
+                return len(self._download(ticker, None))
+            last = stored["date"][-1]
+            check = stored[-2] if len(stored) > 1 else None
+            start = last if check is None else check["date"]
+            tail = frame_to_bars(self.source(ticker, str(start)))
+            tail = tail[tail["date"] >= start]
+            if check is not None:
+                fetched = tail[tail["date"] == check["date"]]
+                if len(fetched) == 0 or not np.isclose(
+                    fetched["close"][0], check["close"], rtol=1e-6, atol=0
+                ):
+                    bars = self._download(ticker, str(stored["date"][0]))
+                    return int(np.count_nonzero(bars["date"] > last))
+            keep = stored[stored["date"] < tail["date"][0]] if len(tail) else stored
+            self.write(ticker, np.concatenate([keep, tail]))
+            return int(np.count_nonzero(tail["date"] > last))
+
+    def _download(self, ticker, start):
+        """Replace the stored bars with a fresh download from start."""
+        bars = frame_to_bars(self.source(ticker, start))
+        if len(bars) == 0:
+            raise ValueError(f"No price data available for {ticker}")
+        self.write(ticker, bars)
+        return bars
+
+    def extend(self, ticker, start):
+        """
+        Download the bars before the first stored date back to start.
+        Returns the number of bars added.
+        """
+        if self.offline or ticker in self._complete:
+            return 0
+        start = np.datetime64(start, "D")
+        with self._lock(ticker):
+            stored = self.read(ticker)
+            # A few days' slack absorbs weekends and holidays at the start
+            # of a period
+            if (
+                stored is None
+                or len(stored) == 0
+                or start + EXTEND_SLACK >= stored["date"][0]
+            ):
+                return 0
+            first = stored["date"][0]
+            fetched = frame_to_bars(self.source(ticker, str(start)))
+            head = fetched[fetched["date"] < first]
+            overlap = fetched[fetched["date"] == first]
+            if len(overlap) and not np.isclose(
+                overlap["close"][0], stored["close"][0], rtol=1e-6, atol=0
+            ):
+                # Re-adjusted upstream since the store was written
+                self.write(ticker, fetched)
+                return len(head)
+            if len(head) == 0 or head["date"][0] > start + EXTEND_SLACK:
+                # Listing starts after the requested date
+                self._complete.add(ticker)
+            if len(head):
+                self.write(ticker, np.concatenate([head, stored]))
+            return len(head)
+
+    def bars(self, ticker, start=None, end=None):
+        """
+        Bars for ticker between start and end (inclusive dates), updating
+        the store first when it is stale and extending it back to start.
+        """
+        try:
+            self.update(ticker)
+            if start is not None:
+                self.extend(ticker, start)
+        except Exception:
+            # Serve what is stored if upstream is unavailable
+            if self.read(ticker) is None:
+                raise
+        stored = self.read(ticker)
+        if stored is None:
+            raise ValueError(f"No stored price data for {ticker}")
+        dates = stored["date"]
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "D"))
+        hi = len(dates) if end is None else np.searchsorted(
+            dates, np.datetime64(end, "D"), side="right"
+        )
+        return stored[lo:hi]
+
+    def period(self, ticker, period="1y"):
+        """Bars over a yfinance-style period ("1mo" .. "10y")."""
+        if period not in PERIOD_OFFSETS:
+            raise ValueError(f"period must be one of {tuple(PERIOD_OFFSETS)}")
+        start = pd.Timestamp.today().normalize() - PERIOD_OFFSETS[period]
+        return self.bars(ticker, start=start.date())
+
+
+# Shared by every MarketDataFetcher in the process
+price_store = PriceStore()
@@ -0,0 +1,115 @@
+"""
+Pricing Result Cache
+
+Thread-safe LRU cache with a time-to-live for model results. Keys are
+built from the pricing inputs and numeric engine settings rounded to a
+fixed number of significant figures, so a resubmitted contract whose inputs
+only moved in the last few digits is served from memory.
+"""
+
+import copy
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+def quantize(value, significant_digits=6):
+    """Round a number to the given significant figures; other values pass through."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    if value == 0 or not math.isfinite(value):
+        return float(value)
+    digits = significant_digits - 1 - int(math.floor(math.log10(abs(value))))
+    return round(float(value), digits)
+
+
+class PricingCache:
+    """
+    LRU + TTL cache for pricing results.
+
+    Parameters:
+        max_entries: Maximum number of cached results
+        ttl: Seconds a result stays valid
+        significant_digits: Precision of the numeric inputs in the key
+        clock: Monotonic time source
+    """
+
+    def __init__(
+        self, max_entries=512, ttl=300.0, significant_digits=6, clock=time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.significant_digits = significant_digits
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, model, inputs, settings=None):
+        """Cache key for a model name, its pricing inputs and engine settings."""
+        return (
+            model,
+            tuple(quantize(v, self.significant_digits) for v in inputs),
+            tuple(
+                (name, quantize(value, self.significant_digits))
+                for name, value in sorted((settings or {}).items())
+            ),
+        )
+
+    def get(self, key):
+        """Cached value for key, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # Hand out copies so callers cannot mutate the cached result
+            return copy.deepcopy(entry[1])
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, model, inputs, settings, compute):
+        """
+        Return the cached result for (model, inputs, settings), calling
+        compute() and caching its result on a miss.
+        """
+        key = self.key(model, inputs, settings)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -5,32 +5,91 @@ Implements Black-Scholes, Monte Carlo, and Binomial Tree pricing models
 for European, American, Asian, Lookback, and Barrier options.
 """
 
+import copy
+import importlib.util
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
 import numpy as np
 
-def norm_pdf(x):
-    """Standard normal probability density function."""
-    return (1.0 / np.sqrt(2 * np.pi)) * np.exp(-0.5 * x**2)
+from lib import aad
+from lib.exotic_models import bgk_shift, geometric_asian_price
+from lib.finite_difference import FiniteDifferenceModel
+from lib.numerics import norm_cdf, norm_pdf
+
+
+# Adjoint-differentiable price functions: written against lib.aad, so they
+# evaluate on plain floats and arrays or record on a tape for gradients.
+def _aad_black_scholes(S, K, T, r, sigma, q, option_type):
+    w = 1.0 if option_type.lower() == "call" else -1.0
+    sqrt_T = aad.sqrt(T)
+    d1 = (aad.log(S / K) + (r - q + 0.5 * sigma**2) * T) / (sigma * sqrt_T)
+    d2 = d1 - sigma * sqrt_T
+    return w * (
+        S * aad.exp(-q * T) * aad.norm_cdf(w * d1)
+        - K * aad.exp(-r * T) * aad.norm_cdf(w * d2)
+    )
 
-def norm_cdf(x):
+
+def _aad_binomial(S, K, T, r, sigma, q, n_steps, option_type, american):
     """
-    Standard normal cumulative distribution function.
-    Uses Hasting's approximation (precision ~1e-7).
+    CRR rollback; the payoff and early-exercise max pass adjoints to the
+    larger leg, split evenly on ties (an at-the-money terminal node).
     """
-    a1 = 0.319381530
-    a2 = -0.356563782
-    a3 = 1.781477937
-    a4 = -1.821255978
-    a5 = 1.330274429
-    p = 0.2316419
-    
-    # Handle negative values
-    is_negative = x < 0
-    x = np.abs(x)
-    
-    t = 1.0 / (1.0 + p * x)
-    y = 1.0 - norm_pdf(x) * (a1*t + a2*t**2 + a3*t**3 + a4*t**4 + a5*t**5)
-    
-    return 1.0 - y if is_negative else y
+    sign = 1.0 if option_type.lower() == "call" else -1.0
+    dt = T / n_steps
+    u = aad.exp(sigma * aad.sqrt(dt))
+    d = 1 / u
+    p = (aad.exp((r - q) * dt) - d) / (u - d)
+    discount = aad.exp(-r * dt)
+    # Scalars are folded once so each step records only a few array nodes
+    up_weight, down_weight = discount * p, discount * (1 - p)
+    # Every node price is S u^m for m in -n..n; step k uses m = k, k-2, .., -k
+    intrinsic = sign * (S * u ** np.arange(n_steps, -n_steps - 1, -1.0) - K)
+    values = aad.maximum(intrinsic[::2], 0.0)
+    for k in range(n_steps - 1, -1, -1):
+        values = up_weight * values[:-1] + down_weight * values[1:]
+        if american:
+            values = aad.maximum(values, intrinsic[n_steps - k : n_steps + k + 1 : 2])
+    return values[0]
+
+
+def _aad_monte_carlo(S, K, T, r, sigma, q, Z, payoff, option_type):
+    """Discounted per-path payoffs for one batch of normals Z."""
+    n_steps = Z.shape[1]
+    column = [aad.reshape(x, (-1, 1)) for x in (S, T, r, sigma, q)]
+    S_col, T_col, r_col, sigma_col, q_col = column
+    dt = T_col / n_steps
+    increments = (r_col - q_col - 0.5 * sigma_col**2) * dt + sigma_col * aad.sqrt(dt) * Z
+    log_paths = aad.cumsum(increments, axis=1)
+    spots = S_col * aad.exp(log_paths)
+    terminal = spots[:, -1]
+    if payoff == "lookback":
+        if option_type.lower() == "call":
+            value = terminal - aad.minimum(S, aad.amin(spots, axis=1))
+        else:
+            value = aad.maximum(S, aad.amax(spots, axis=1)) - terminal
+    else:
+        if payoff == "european":
+            underlying = terminal
+        elif payoff == "asian_arithmetic":
+            underlying = (S + aad.sum(spots, axis=1)) / (n_steps + 1)
+        else:
+            underlying = S * aad.exp(aad.sum(log_paths, axis=1) / (n_steps + 1))
+        sign = 1.0 if option_type.lower() == "call" else -1.0
+        value = aad.maximum(sign * (underlying - K), 0.0)
+    return aad.exp(-r * T) * value
+
+
+def _record_columns(contracts, fields):
+    """Pick the given fields out of a structured array, DataFrame or dict."""
+    dtype = getattr(contracts, "dtype", None)
+    names = dtype.names if dtype is not None else None
+    if names is None:
+        names = list(contracts.keys())
+    return {f: np.asarray(contracts[f]) for f in fields if f in names}
 
 
 class BlackScholesModel:
@@ -132,16 +191,463 @@ class BlackScholesModel:
             "greeks": self.get_all_greeks(option_type),
         }
 
+    def gradient(self, option_type="call"):
+        """
+        Price and its full gradient in S, K, T, r, sigma and q from one
+        adjoint pass. Derivatives are per unit (theta is -dT).
+        """
+        price, gradient = aad.value_and_gradient(
+            partial(_aad_black_scholes, option_type=option_type),
+            S=self.S, K=self.K, T=self.T, r=self.r, sigma=self.sigma, q=self.q,
+        )
+        return {"price": float(price), "gradient": _float_dict(gradient)}
+
+
+class BatchBlackScholesModel:
+    """
+    Vectorized Black-Scholes-Merton pricer for whole option chains.
+
+    Every input may be a scalar or an array; inputs are broadcast against
+    each other so a full strike/expiry grid is priced in a single pass.
+    Discount factors, d1/d2 and the normal CDF/PDF terms are computed once
+    and shared between the price and all five Greeks, which use the same
+    units as BlackScholesModel (theta per day, vega and rho per 1%).
+
+    Parameters:
+        S: Spot price(s)
+        K: Strike price(s)
+        T: Time(s) to expiry (years)
+        r: Risk-free rate(s)
+        sigma: Volatility(ies)
+        q: Dividend yield(s)
+        option_type: "call"/"put", or an array of them
+    """
+
+    FIELDS = ("S", "K", "T", "r", "sigma", "q", "option_type")
+
+    def __init__(self, S, K, T, r, sigma, q=0, option_type="call"):
+        S, K, T, r, sigma, q, is_call = np.broadcast_arrays(
+            np.asarray(S, dtype=float),
+            np.asarray(K, dtype=float),
+            np.maximum(np.asarray(T, dtype=float), 1e-10),
+            np.asarray(r, dtype=float),
+            np.maximum(np.asarray(sigma, dtype=float), 1e-10),
+            np.asarray(q, dtype=float),
+            self._is_call(option_type),
+        )
+        self.S = S
+        self.K = K
+        self.T = T
+        self.r = r
+        self.sigma = sigma
+        self.q = q
+        self.is_call = is_call
+        self._calculate_d1_d2()
+
+    @classmethod
+    def from_records(cls, contracts):
+        """
+        Build a batch from a structured array (or DataFrame / dict of
+        columns) with fields S, K, T, r, sigma and optionally q and
+        option_type.
+        """
+        return cls(**_record_columns(contracts, cls.FIELDS))
+
+    @staticmethod
+    def _is_call(option_type):
+        option_type = np.asarray(option_type)
+        if option_type.dtype == bool:
+            return option_type
+        return np.char.lower(option_type.astype(str)) == "call"
+
+    def _calculate_d1_d2(self):
+        self.sqrt_T = np.sqrt(self.T)
+        self.d1 = (
+            np.log(self.S / self.K)
+            + (self.r - self.q + 0.5 * self.sigma**2) * self.T
+        ) / (self.sigma * self.sqrt_T)
+        self.d2 = self.d1 - self.sigma * self.sqrt_T
+
+    def price(self):
+        return self.get_results()["price"]
+
+    def get_results(self):
+        """Prices and all five Greeks as arrays, computed in one pass."""
+        w = np.where(self.is_call, 1.0, -1.0)
+        df_q = np.exp(-self.q * self.T)
+        df_r = np.exp(-self.r * self.T)
+        n_d1 = norm_pdf(self.d1)
+        N_wd1 = norm_cdf(w * self.d1)
+        N_wd2 = norm_cdf(w * self.d2)
+        spot_leg = self.S * df_q * N_wd1
+        strike_leg = self.K * df_r * N_wd2
+        theta = (
+            -(self.S * self.sigma * df_q * n_d1) / (2 * self.sqrt_T)
+            + w * self.q * spot_leg
+            - w * self.r * strike_leg
+        )
+        return {
+            "price": w * (spot_leg - strike_leg),
+            "greeks": {
+                "delta": w * df_q * N_wd1,
+                "gamma": df_q * n_d1 / (self.S * self.sigma * self.sqrt_T),
+                "theta": theta / 365,
+                "vega": self.S * df_q * self.sqrt_T * n_d1 / 100,
+                "rho": w * self.T * strike_leg / 100,
+            },
+        }
+
+
+def _float_dict(values):
+    return {name: float(value) for name, value in values.items()}
+
+
+class RunningMoments:
+    """
+    Online mean and variance accumulator.
+
+    Batches are folded in with Chan's parallel form of Welford's update,
+    so memory stays constant no matter how many samples are seen and two
+    accumulators can be merged exactly. The variance is the population
+    variance, matching np.std.
+
+    Two-column samples (payoff, control) accumulate the full co-moment
+    matrix, which is what the control variate estimate needs.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return self
+        batch = RunningMoments()
+        batch.count = len(values)
+        batch.mean = values.mean(axis=0)
+        centered = values - batch.mean
+        if values.ndim == 2:
+            batch.m2 = centered.T @ centered
+        else:
+            batch.m2 = float(centered @ centered)
+        return self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / total
+        self.m2 = (
+            self.m2
+            + other.m2
+            + np.multiply.outer(delta, delta) * self.count * other.count / total
+        )
+        self.count = total
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std_error(self):
+        return np.sqrt(self.variance / self.count) if self.count else 0.0
+
+    def estimate(self, control_mean=None):
+        """
+        Mean and standard error, optionally using the second column as a
+        control variate with known mean control_mean and the optimal
+        (sample-estimated) coefficient.
+        """
+        if control_mean is None:
+            return float(self.mean), float(self.std_error)
+        if self.count == 0:
+            return 0.0, 0.0
+        (mean_y, mean_x), cov = self.mean, self.variance
+        beta = cov[0, 1] / cov[1, 1] if cov[1, 1] > 0 else 0.0
+        residual_var = max(cov[0, 0] - beta * cov[0, 1], 0.0)
+        price = mean_y - beta * (mean_x - control_mean)
+        return float(price), float(np.sqrt(residual_var / self.count))
+
+
+def _brownian_bridge_plan(n_steps):
+    """
+    Construction order for a Brownian bridge over n_steps equal steps.
+
+    The terminal point comes first and each interval is then bisected
+    breadth-first, so the leading (best distributed) quasi-random
+    dimensions drive the large-scale shape of the path. Entries are
+    (target, left, right, left_weight, right_weight, std) in units of dt;
+    index -1 stands for time zero where W = 0.
+    """
+    plan = [(n_steps - 1, -1, -1, 0.0, 0.0, np.sqrt(n_steps))]
+    intervals = deque([(-1, n_steps - 1)])
+    while intervals:
+        left, right = intervals.popleft()
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        span, before, after = right - left, mid - left, right - mid
+        plan.append(
+            (mid, left, right, after / span, before / span, np.sqrt(before * after / span))
+        )
+        intervals.append((left, mid))
+        intervals.append((mid, right))
+    return plan
+
+
+class SobolNormals:
+    """
+    Randomized (scrambled) Sobol source of standard normal increments.
+
+    Exposes the standard_normal(size) interface of a NumPy generator, so
+    it can stand in for one in MonteCarloModel. Each row is a quasi-random
+    point mapped through the inverse normal CDF and assembled into a path
+    with a Brownian bridge; the returned rows are the equivalent per-step
+    increments W(t+dt) - W(t) in units of sqrt(dt). Requires scipy.
+    """
+
+    def __init__(self, n_steps, seed=None):
+        try:
+            from scipy.special import ndtri
+            from scipy.stats import qmc
+        except ImportError as e:
+            raise ImportError("Sobol sampling requires scipy") from e
+        self._ndtri = ndtri
+        self.n_steps = n_steps
+        self.engine = qmc.Sobol(
+            d=n_steps, scramble=True, seed=np.random.default_rng(seed)
+        )
+        self.plan = _brownian_bridge_plan(n_steps)
+
+    def standard_normal(self, size):
+        n_paths, n_steps = size
+        u = self.engine.random(n_paths)
+        z = self._ndtri(np.clip(u, 1e-16, 1 - 1e-16))
+        W = np.empty((n_paths, n_steps))
+        for k, (target, left, right, w_left, w_right, std) in enumerate(self.plan):
+            W[:, target] = std * z[:, k]
+            if left >= 0:
+                W[:, target] += w_left * W[:, left]
+            if right >= 0:
+                W[:, target] += w_right * W[:, right]
+        return np.diff(W, axis=1, prepend=0.0)
+
+
+def _vanilla(option_type, underlying, strike):
+    if option_type.lower() == "call":
+        return np.maximum(underlying - strike, 0)
+    return np.maximum(strike - underlying, 0)
+
+
+# Payoff functionals evaluated on MonteCarloModel path statistics. They are
+# module-level so that functools.partial payoffs can be pickled to workers.
+def _vanilla_payoff(stats, key, option_type, strike):
+    return _vanilla(option_type, stats[key], strike)
+
+
+def _lookback_payoff(stats, option_type):
+    if option_type.lower() == "call":
+        return np.maximum(stats["terminal"] - stats["minimum"], 0)
+    return np.maximum(stats["maximum"] - stats["terminal"], 0)
+
+
+def _barrier_payoff(stats, option_type, strike, barrier, knock_out):
+    base = _vanilla(option_type, stats["terminal"], strike)
+    survival = stats.get("barrier_survival", {}).get(barrier)
+    if survival is not None:
+        return base * survival if knock_out else base * (1 - survival)
+    hit = stats["barrier_hit"][barrier]
+    return np.where(hit != knock_out, base, 0)
+
+
+def _pathwise_delta(stats, key, option_type, strike, spot):
+    underlying = stats[key]
+    # Every averaged or terminal price is proportional to the spot
+    if option_type.lower() == "call":
+        return np.where(underlying > strike, underlying / spot, 0.0)
+    return np.where(underlying < strike, -underlying / spot, 0.0)
+
+
+def _pathwise_vega(stats, key, option_type, strike):
+    underlying, sensitivity = stats[key], stats["vega"][key]
+    if option_type.lower() == "call":
+        return np.where(underlying > strike, sensitivity, 0.0)
+    return np.where(underlying < strike, -sensitivity, 0.0)
+
+
+def _lookback_delta(stats, option_type, spot):
+    return _lookback_payoff(stats, option_type) / spot
+
+
+def _lookback_vega(stats, option_type):
+    vega = stats["vega"]
+    if option_type.lower() == "call":
+        return vega["terminal"] - vega["minimum"]
+    return vega["maximum"] - vega["terminal"]
+
+
+def _likelihood_ratio(stats, payoff, score):
+    return payoff(stats) * stats["scores"][score]
+
+
+def _bump_difference(stats, up, down, width):
+    """Revalue the same normals under two bumped models (common random numbers)."""
+    values = []
+    for model, payoff, barriers in (up, down):
+        values.append(payoff(model._path_statistics(stats["normals"], barriers)))
+    return (values[0] - values[1]) / width
+
+
+def _statistic(stats, key):
+    return stats[key]
+
+
+def _with_control(stats, payoff, control):
+    return np.column_stack([payoff(stats), control(stats)])
+
+
+def _pair_average(values):
+    """Average antithetic pairs (row i with row i + n/2) into one sample."""
+    half = len(values) // 2
+    return 0.5 * (values[:half] + values[half:])
+
+
+def _simulate_chunk(model, payoffs, barriers, antithetic, seed_sequence, n_paths):
+    """Worker entry point: accumulate payoff moments over n_paths paths."""
+    rng = np.random.default_rng(seed_sequence)
+    return model._accumulate(payoffs, barriers, antithetic, rng, n_paths)
+
 
 class MonteCarloModel:
     """
     Monte Carlo simulation for option pricing.
 
     Supports: European, Asian, Lookback, and Barrier options.
-    Uses antithetic variates for variance reduction.
+    Uses antithetic variates for variance reduction; each antithetic pair
+    is averaged into one sample so standard errors account for the pairing.
+
+    Paths are simulated once and walked forward step by step, keeping only
+    the running statistics the payoffs need (terminal price, running sum
+    and log-sum, minimum, maximum and barrier-hit flags), so any number of
+    payoffs can be priced from a single simulation.
+
+    Paths are simulated in batches of at most `batch_size` and payoffs are
+    folded into online accumulators, so peak memory is bounded by the batch
+    size rather than by n_simulations.
+
+    With n_workers > 1 the simulations are split across a process (or
+    thread) pool. Each worker draws from its own Generator spawned from
+    SeedSequence(seed), and partial results are merged in worker order, so
+    a given seed and worker count always reproduce the same price and
+    standard error. Single-worker runs use a private RandomState and never
+    touch NumPy's global generator.
+
+    Setting target_std_error, rel_tolerance and/or spot_tolerance (and
+    optionally a time_budget in seconds) switches to adaptive sampling:
+    batches are simulated until every payoff's standard error meets the
+    target, the time budget runs out, or n_simulations paths (the cap)
+    have been used. The target is max(target_std_error, spot_tolerance *
+    S, rel_tolerance * |price|), so target_std_error (absolute) or
+    spot_tolerance (a fraction of spot) acts as a floor that lets
+    near-zero prices stop before the cap. A payoff is only tested once it
+    has min_paths paths and a nonzero sample variance, so a deep
+    out-of-the-money payoff whose first batches are all zero is not taken
+    as converged; if it is still identically zero at min_paths it stops
+    there and is reported with converged="degenerate".
+    Each payoff stops accumulating as soon as it converges, and its paths,
+    elapsed time and convergence flag are reported in `diagnostics`.
+    Adaptive runs are single-worker.
+
+    With control_variates=True each payoff is paired with a control whose
+    expectation is known in closed form: the terminal price for the
+    European, the discrete geometric Asian for the arithmetic Asian and
+    the Black-Scholes European for the remaining exotics. sampler="sobol"
+    replaces pseudo-random draws with scrambled Sobol points assembled by a
+    Brownian bridge (antithetic pairing is then skipped); its standard
+    error comes from qmc_replications independent scramblings, each of
+    n_simulations / qmc_replications paths rounded down to a power of two
+    (Sobol points keep their balance properties in powers of two), so a
+    Sobol run may use fewer paths than n_simulations; get_results reports
+    the number actually simulated. Sobol sampling requires scipy (not in
+    requirements.txt; install it separately) and does not combine with
+    adaptive or multi-worker runs.
+
+    get_results also estimates delta and vega on the simulated paths:
+    pathwise derivatives for the European, Asian and lookback payoffs,
+    likelihood-ratio scores for the discontinuous barrier payoff, and a
+    common-random-numbers bump of the same normals where neither applies
+    (corrected barriers). Each comes with its own standard error.
+
+    Barriers are checked at the simulation dates only unless
+    barrier_correction is set, in which case they approximate continuous
+    monitoring: "brownian_bridge" weights each path by its probability of
+    not crossing between dates, exp(-2 ln(S_i/B) ln(S_i+1/B) / (sigma^2 dt))
+    being the chance a bridge crossed, and "bgk" shifts the barrier towards
+    the spot by exp(0.5826 sigma sqrt(dt)) (Broadie-Glasserman-Kou).
+    With barrier_pde_check=True get_results also prices the barrier with
+    the Crank-Nicolson engine as a cross-check (barrier.pde_price); the
+    solve runs outside time_budget, so it is off by default.
     """
 
-    def __init__(self, S, K, T, r, sigma, q=0, n_simulations=100000, n_steps=252):
+    SAMPLERS = ("pseudorandom", "sobol")
+    BARRIER_CORRECTIONS = (None, "brownian_bridge", "bgk")
+
+    # Control used for each payoff when control_variates is enabled
+    CONTROL_VARIATES = {
+        "european": "underlying",
+        "asian_arithmetic": "geometric_asian",
+        "asian_geometric": "european",
+        "lookback": "european",
+        "barrier": "european",
+    }
+
+    def __init__(
+        self,
+        S,
+        K,
+        T,
+        r,
+        sigma,
+        q=0,
+        n_simulations=100000,
+        n_steps=252,
+        batch_size=25000,
+        seed=42,
+        n_workers=1,
+        executor="process",
+        target_std_error=None,
+        rel_tolerance=None,
+        spot_tolerance=None,
+        time_budget=None,
+        min_paths=20000,
+        control_variates=False,
+        sampler="pseudorandom",
+        qmc_replications=8,
+        barrier_correction=None,
+        barrier_pde_check=False,
+    ):
+        if sampler not in self.SAMPLERS:
+            raise ValueError(f"sampler must be one of {self.SAMPLERS}")
+        if barrier_correction not in self.BARRIER_CORRECTIONS:
+            raise ValueError(
+                f"barrier_correction must be one of {self.BARRIER_CORRECTIONS}"
+            )
+        adaptive = any(
+            t is not None for t in (target_std_error, rel_tolerance, spot_tolerance)
+        )
+        if sampler == "sobol" and (n_workers > 1 or adaptive):
+            raise ValueError(
+                "Sobol sampling does not support adaptive or multi-worker runs"
+            )
+        if sampler == "sobol" and importlib.util.find_spec("scipy") is None:
+            raise ImportError(
+                "sampler='sobol' requires scipy, which is an optional "
+                "dependency: pip install scipy"
+            )
         self.S = S
         self.K = K
         self.T = max(T, 1e-10)
@@ -151,140 +657,1002 @@ class MonteCarloModel:
         self.n_simulations = n_simulations
         self.n_steps = n_steps
         self.dt = self.T / n_steps
+        self.batch_size = batch_size
+        self.seed = seed
+        self.n_workers = n_workers
+        self.executor = executor
+        self.target_std_error = target_std_error
+        self.rel_tolerance = rel_tolerance
+        self.spot_tolerance = spot_tolerance
+        self.time_budget = time_budget
+        self.min_paths = min_paths
+        self.control_variates = control_variates
+        self.sampler = sampler
+        self.qmc_replications = qmc_replications
+        self.barrier_correction = barrier_correction
+        self.barrier_pde_check = barrier_pde_check
+        self.diagnostics = {}
+        self._sensitivities = False
 
-    def _generate_paths(self, antithetic=True, seed=42):
-        np.random.seed(seed)
+    @property
+    def adaptive(self):
+        return any(
+            t is not None
+            for t in (self.target_std_error, self.rel_tolerance, self.spot_tolerance)
+        )
+
+    def _generate_normals(self, antithetic=True, seed=None):
+        rng = np.random.RandomState(self.seed if seed is None else seed)
         n_sims = self.n_simulations // 2 if antithetic else self.n_simulations
-        drift = (self.r - self.q - 0.5 * self.sigma**2) * self.dt
-        vol = self.sigma * np.sqrt(self.dt)
-        Z = np.random.standard_normal((n_sims, self.n_steps))
+        Z = rng.standard_normal((n_sims, self.n_steps))
         if antithetic:
             Z = np.vstack([Z, -Z])
+        return Z
+
+    def _normal_batches(self, rng, n_paths, antithetic=True, batch_size=None):
+        """
+        Yield normals for n_paths paths in row batches.
+
+        Rows are drawn from the generator in the same order as
+        _generate_normals, so the batches together contain exactly the
+        same paths as the full matrix.
+        """
+        n_sims = n_paths // 2 if antithetic else n_paths
+        batch = batch_size or self.batch_size or n_paths
+        batch = max(batch // 2 if antithetic else batch, 1)
+        for start in range(0, n_sims, batch):
+            Z = rng.standard_normal((min(batch, n_sims - start), self.n_steps))
+            yield np.vstack([Z, -Z]) if antithetic else Z
+
+    def _generate_paths(self, antithetic=True, seed=None):
+        Z = self._generate_normals(antithetic, seed)
+        drift = (self.r - self.q - 0.5 * self.sigma**2) * self.dt
+        vol = self.sigma * np.sqrt(self.dt)
         log_returns = drift + vol * Z
         log_paths = np.cumsum(log_returns, axis=1)
         paths = self.S * np.exp(log_paths)
-        paths = np.column_stack([np.full(self.n_simulations, self.S), paths])
+        paths = np.column_stack([np.full(len(Z), self.S), paths])
         return paths
 
-    def european_option_price(self, option_type="call"):
-        paths = self._generate_paths()
-        final_prices = paths[:, -1]
-        if option_type.lower() == "call":
-            payoffs = np.maximum(final_prices - self.K, 0)
-        else:
-            payoffs = np.maximum(self.K - final_prices, 0)
+    def _path_statistics(self, Z, barriers=()):
+        """
+        Walk paths driven by the normals Z forward one step at a time.
+
+        Returns per-path terminal price, arithmetic and geometric averages
+        (including the initial price), running minimum and maximum, and a
+        hit flag for every (direction, level) pair in `barriers`. With the
+        Brownian-bridge correction each barrier also gets the probability
+        that the continuous path never touched it. When sensitivities are
+        requested the stats also carry each statistic's pathwise derivative
+        in sigma, the likelihood-ratio scores and the normals themselves.
+        """
+        n_paths = len(Z)
+        drift = (self.r - self.q - 0.5 * self.sigma**2) * self.dt
+        vol = self.sigma * np.sqrt(self.dt)
+        log_path = np.zeros(n_paths)
+        log_sum = np.zeros(n_paths)
+        spot = np.full(n_paths, float(self.S))
+        running_sum = spot.copy()
+        running_min = spot.copy()
+        running_max = spot.copy()
+        hits = {barrier: self._crossed(spot, *barrier) for barrier in barriers}
+        bridge = self.barrier_correction == "brownian_bridge"
+        if bridge:
+            survival = {b: (~hit).astype(float) for b, hit in hits.items()}
+            log_levels = {b: np.log(b[1] / self.S) for b in barriers}
+            bridge_scale = 2 / (self.sigma**2 * self.dt)
+        sensitivities = self._sensitivities
+        if sensitivities:
+            # d S_t / d sigma = S_t (ln(S_t / S) - carry t) / sigma
+            carry = self.r - self.q + 0.5 * self.sigma**2
+            vega_sum = np.zeros(n_paths)
+            minimum_vega = np.zeros(n_paths)
+            maximum_vega = np.zeros(n_paths)
+            vega_score = np.zeros(n_paths)
+        for i in range(self.n_steps):
+            if bridge:
+                previous = log_path.copy()
+            log_path += drift + vol * Z[:, i]
+            spot = self.S * np.exp(log_path)
+            if sensitivities:
+                point_vega = spot * (log_path - carry * (i + 1) * self.dt) / self.sigma
+                vega_sum += point_vega
+                minimum_vega = np.where(spot < running_min, point_vega, minimum_vega)
+                maximum_vega = np.where(spot > running_max, point_vega, maximum_vega)
+                z = Z[:, i]
+                vega_score += (z * z - 1) / self.sigma - z * np.sqrt(self.dt)
+            running_sum += spot
+            log_sum += log_path
+            np.minimum(running_min, spot, out=running_min)
+            np.maximum(running_max, spot, out=running_max)
+            for barrier, hit in hits.items():
+                hit |= self._crossed(spot, *barrier)
+            if bridge:
+                for barrier, alive in survival.items():
+                    level = log_levels[barrier]
+                    # Endpoints on opposite sides give a non-positive
+                    # product and a survival factor of zero
+                    exponent = bridge_scale * (previous - level) * (log_path - level)
+                    alive *= np.maximum(-np.expm1(-exponent), 0)
+        n_points = self.n_steps + 1
+        stats = {
+            "terminal": spot,
+            "average": running_sum / n_points,
+            "geometric_average": self.S * np.exp(log_sum / n_points),
+            "minimum": running_min,
+            "maximum": running_max,
+            "barrier_hit": hits,
+        }
+        if bridge:
+            stats["barrier_survival"] = survival
+        if sensitivities:
+            time_sum = self.dt * self.n_steps * n_points / 2
+            stats["vega"] = {
+                "terminal": point_vega,
+                "average": vega_sum / n_points,
+                "geometric_average": stats["geometric_average"]
+                * (log_sum - carry * time_sum)
+                / (self.sigma * n_points),
+                "minimum": minimum_vega,
+                "maximum": maximum_vega,
+            }
+            stats["scores"] = {
+                "delta": Z[:, 0] / (self.S * self.sigma * np.sqrt(self.dt)),
+                "vega": vega_score,
+            }
+            stats["normals"] = Z
+        return stats
+
+    @staticmethod
+    def _crossed(spot, direction, level):
+        return spot <= level if direction == "down" else spot >= level
+
+    def european_payoff(self, option_type="call"):
+        return partial(
+            _vanilla_payoff, key="terminal", option_type=option_type, strike=self.K
+        )
+
+    def asian_payoff(self, option_type="call", averaging="arithmetic"):
+        key = "average" if averaging == "arithmetic" else "geometric_average"
+        return partial(
+            _vanilla_payoff, key=key, option_type=option_type, strike=self.K
+        )
+
+    def lookback_payoff(self, option_type="call"):
+        return partial(_lookback_payoff, option_type=option_type)
+
+    def barrier_payoff(self, option_type, barrier_type, barrier_level):
+        """Returns the payoff and the barrier it needs tracked."""
+        direction = "down" if "down" in barrier_type else "up"
+        if self.barrier_correction == "bgk":
+            shift = bgk_shift(self.sigma, self.T, self.n_steps)
+            barrier_level *= shift if direction == "down" else 1 / shift
+        barrier = (direction, barrier_level)
+        payoff = partial(
+            _barrier_payoff,
+            option_type=option_type,
+            strike=self.K,
+            barrier=barrier,
+            knock_out="out" in barrier_type,
+        )
+        return payoff, barrier
+
+    def control_variate(self, kind, option_type="call"):
+        """Returns (control payoff, undiscounted expectation) for a control."""
+        growth = np.exp(self.r * self.T)
+        if kind == "underlying":
+            forward = self.S * np.exp((self.r - self.q) * self.T)
+            return partial(_statistic, key="terminal"), forward
+        if kind == "geometric_asian":
+            price = geometric_asian_price(
+                self.S, self.K, self.T, self.r, self.sigma, self.q,
+                self.n_steps, option_type,
+            )
+            return self.asian_payoff(option_type, "geometric"), price * growth
+        if kind == "european":
+            bs = BlackScholesModel(self.S, self.K, self.T, self.r, self.sigma, self.q)
+            return self.european_payoff(option_type), bs.price(option_type) * growth
+        raise ValueError(f"Unknown control variate: {kind}")
+
+    def _controls(self, names, option_type):
+        if not self.control_variates:
+            return None
+        return {
+            name: self.control_variate(self.CONTROL_VARIATES[name], option_type)
+            for name in names
+            if name in self.CONTROL_VARIATES
+        }
+
+    def _bumped(self, **changes):
+        model = copy.copy(self)
+        model.n_workers, model.executor = 1, None
+        model._sensitivities = False
+        for name, value in changes.items():
+            setattr(model, name, value)
+        return model
+
+    def greek_payoffs(self, name, option_type="call", barrier_type=None, barrier_level=None):
+        """
+        Delta and vega estimators for one of the get_results payoffs.
+
+        Returns a dict of greek -> (callable(stats), method); the callables
+        need price_payoffs(..., sensitivities=True).
+        """
+        if name == "lookback":
+            return {
+                "delta": (
+                    partial(_lookback_delta, option_type=option_type, spot=self.S),
+                    "pathwise",
+                ),
+                "vega": (partial(_lookback_vega, option_type=option_type), "pathwise"),
+            }
+        if name != "barrier":
+            key = {
+                "european": "terminal",
+                "asian_arithmetic": "average",
+                "asian_geometric": "geometric_average",
+            }[name]
+            return {
+                "delta": (
+                    partial(
+                        _pathwise_delta, key=key, option_type=option_type,
+                        strike=self.K, spot=self.S,
+                    ),
+                    "pathwise",
+                ),
+                "vega": (
+                    partial(_pathwise_vega, key=key, option_type=option_type, strike=self.K),
+                    "pathwise",
+                ),
+            }
+        payoff, _ = self.barrier_payoff(option_type, barrier_type, barrier_level)
+        if self.barrier_correction is None:
+            return {
+                greek: (
+                    partial(_likelihood_ratio, payoff=payoff, score=greek),
+                    "likelihood_ratio",
+                )
+                for greek in ("delta", "vega")
+            }
+        # The corrections depend on S and sigma directly, not only through
+        # the path density, so fall back to bumping on the same normals
+        bumps = {
+            "delta": ("S", 0.01 * self.S),
+            "vega": ("sigma", 0.01),
+        }
+        greeks = {}
+        for greek, (attribute, h) in bumps.items():
+            legs = []
+            for sign in (1, -1):
+                model = self._bumped(**{attribute: getattr(self, attribute) + sign * h})
+                leg_payoff, barrier = model.barrier_payoff(
+                    option_type, barrier_type, barrier_level
+                )
+                legs.append((model, leg_payoff, [barrier]))
+            greeks[greek] = (
+                partial(_bump_difference, up=legs[0], down=legs[1], width=2 * h),
+                "common_random_numbers",
+            )
+        return greeks
+
+    def _accumulate(self, payoffs, barriers, antithetic, rng, n_paths, batch_size=None):
+        moments = {name: RunningMoments() for name in payoffs}
+        for Z in self._normal_batches(rng, n_paths, antithetic, batch_size):
+            stats = self._path_statistics(Z, barriers)
+            for name, payoff in payoffs.items():
+                values = payoff(stats)
+                moments[name].update(_pair_average(values) if antithetic else values)
+        return moments
+
+    def _accumulate_parallel(self, payoffs, barriers, antithetic, seed):
+        n, w = self.n_simulations, self.n_workers
+        shares = [n // w + (i < n % w) for i in range(w)]
+        children = np.random.SeedSequence(seed).spawn(w)
+        # Workers get a plain single-worker copy; the executor itself may
+        # not be picklable
+        worker = copy.copy(self)
+        worker.n_workers, worker.executor = 1, None
+
+        executor = self.executor
+        owns_executor = isinstance(executor, str)
+        if owns_executor:
+            pool = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+            executor = pool(max_workers=w)
+        try:
+            futures = [
+                executor.submit(
+                    _simulate_chunk, worker, payoffs, barriers, antithetic, child, n_paths
+                )
+                for child, n_paths in zip(children, shares)
+            ]
+            partials = [future.result() for future in futures]
+        finally:
+            if owns_executor:
+                executor.shutdown()
+
+        moments = {name: RunningMoments() for name in payoffs}
+        for partial_moments in partials:
+            for name, m in partial_moments.items():
+                moments[name].merge(m)
+        return moments
+
+    def _qmc_paths(self):
+        """Paths per Sobol scrambling: the largest power of two in budget."""
+        n_paths = max(self.n_simulations // self.qmc_replications, 2)
+        return 1 << int(np.log2(n_paths))
+
+    @property
+    def simulated_paths(self):
+        """Number of paths a non-adaptive run simulates."""
+        if self.sampler == "sobol":
+            return self._qmc_paths() * self.qmc_replications
+        return self.n_simulations
+
+    def _accumulate_qmc(self, payoffs, barriers, seed):
+        """One set of moments per independent Sobol scrambling."""
+        n_paths = self._qmc_paths()
+        batch = 1 << int(np.log2(max(self.batch_size or n_paths, 2)))
+        children = np.random.SeedSequence(seed).spawn(self.qmc_replications)
+        return [
+            self._accumulate(
+                payoffs, barriers, False, SobolNormals(self.n_steps, child), n_paths, batch
+            )
+            for child in children
+        ]
+
+    def _has_converged(self, moments, discount, n_paths, control_mean=None):
+        """
+        True once the standard error meets the target, "degenerate" for a
+        payoff that has been identically zero over min_paths paths, and
+        False otherwise.
+        """
+        if moments.count < 2 or n_paths < self.min_paths:
+            return False
+        payoff_variance = np.atleast_2d(moments.variance)[0, 0]
+        if payoff_variance <= 0:
+            # A zero standard error says nothing about the price, but a
+            # payoff that never paid is not worth the rest of the budget
+            payoff_mean = np.atleast_1d(moments.mean)[0]
+            return "degenerate" if payoff_mean == 0 else False
+        mean, std_error = moments.estimate(control_mean)
+        tolerance = max(
+            self.target_std_error or 0.0,
+            (self.spot_tolerance or 0.0) * self.S,
+            (self.rel_tolerance or 0.0) * abs(discount * mean),
+        )
+        return discount * std_error <= tolerance
+
+    def _accumulate_adaptive(self, payoffs, barriers, antithetic, rng, control_means):
         discount = np.exp(-self.r * self.T)
-        price = discount * np.mean(payoffs)
-        std_error = discount * np.std(payoffs) / np.sqrt(self.n_simulations)
-        return float(price), float(std_error)
+        moments = {name: RunningMoments() for name in payoffs}
+        pending = dict(payoffs)
+        paths_per_sample = 2 if antithetic else 1
+        start = time.perf_counter()
+        for Z in self._normal_batches(rng, self.n_simulations, antithetic):
+            stats = self._path_statistics(Z, barriers)
+            elapsed = time.perf_counter() - start
+            for name, payoff in list(pending.items()):
+                if name not in pending:
+                    continue
+                values = payoff(stats)
+                moments[name].update(_pair_average(values) if antithetic else values)
+                # Greeks ("name:greek") stop together with their payoff
+                if ":" in name:
+                    continue
+                converged = self._has_converged(
+                    moments[name],
+                    discount,
+                    moments[name].count * paths_per_sample,
+                    control_means.get(name),
+                )
+                if not converged:
+                    continue
+                for greek in [g for g in pending if g.startswith(name + ":")]:
+                    del pending[greek]
+                del pending[name]
+                self.diagnostics[name] = {
+                    "paths": moments[name].count * paths_per_sample,
+                    "elapsed": elapsed,
+                    "converged": converged,
+                }
+            if not pending or (
+                self.time_budget is not None and elapsed >= self.time_budget
+            ):
+                break
+        elapsed = time.perf_counter() - start
+        for name in [name for name in pending if ":" not in name]:
+            self.diagnostics[name] = {
+                "paths": moments[name].count * paths_per_sample,
+                "elapsed": elapsed,
+                "converged": False,
+            }
+        return moments
 
-    def asian_option_price(self, option_type="call", averaging="arithmetic"):
-        paths = self._generate_paths()
-        if averaging == "arithmetic":
-            avg_prices = np.mean(paths, axis=1)
-        else:
-            avg_prices = np.exp(np.mean(np.log(paths), axis=1))
-        if option_type.lower() == "call":
-            payoffs = np.maximum(avg_prices - self.K, 0)
-        else:
-            payoffs = np.maximum(self.K - avg_prices, 0)
+    def price_payoffs(
+        self,
+        payoffs,
+        barriers=(),
+        antithetic=True,
+        seed=None,
+        controls=None,
+        sensitivities=False,
+    ):
+        """
+        Price several payoffs on one shared set of simulated paths.
+
+        Parameters:
+            payoffs: Dict of name -> callable(stats) returning payoffs
+            barriers: (direction, level) pairs the payoffs need tracked
+            controls: Optional dict of name -> (control payoff, undiscounted
+                expectation) used as control variates
+            sensitivities: Add the pathwise/likelihood-ratio statistics
+                needed by greek_payoffs to the path stats
+
+        Returns a dict of name -> (price, std_error).
+        """
+        seed = self.seed if seed is None else seed
+        self.diagnostics = {}
+        self._sensitivities = sensitivities
+        controls = controls or {}
+        control_means = {name: mean for name, (_, mean) in controls.items()}
+        payoffs = {
+            name: (
+                partial(_with_control, payoff=payoff, control=controls[name][0])
+                if name in controls
+                else payoff
+            )
+            for name, payoff in payoffs.items()
+        }
         discount = np.exp(-self.r * self.T)
-        price = discount * np.mean(payoffs)
-        std_error = discount * np.std(payoffs) / np.sqrt(self.n_simulations)
-        return float(price), float(std_error)
 
-    def lookback_option_price(self, option_type="call"):
-        paths = self._generate_paths()
-        final_prices = paths[:, -1]
-        if option_type.lower() == "call":
-            min_prices = np.min(paths, axis=1)
-            payoffs = np.maximum(final_prices - min_prices, 0)
+        if self.sampler == "sobol":
+            replicates = self._accumulate_qmc(payoffs, barriers, seed)
+            results = {}
+            for name in payoffs:
+                estimates = [
+                    m[name].estimate(control_means.get(name))[0] for m in replicates
+                ]
+                std_error = np.std(estimates, ddof=1) / np.sqrt(len(estimates))
+                results[name] = (
+                    float(discount * np.mean(estimates)),
+                    float(discount * std_error),
+                )
+            return results
+
+        if self.adaptive:
+            rng = np.random.RandomState(seed)
+            moments = self._accumulate_adaptive(
+                payoffs, barriers, antithetic, rng, control_means
+            )
+        elif self.n_workers > 1:
+            moments = self._accumulate_parallel(payoffs, barriers, antithetic, seed)
         else:
-            max_prices = np.max(paths, axis=1)
-            payoffs = np.maximum(max_prices - final_prices, 0)
-        discount = np.exp(-self.r * self.T)
-        price = discount * np.mean(payoffs)
-        std_error = discount * np.std(payoffs) / np.sqrt(self.n_simulations)
-        return float(price), float(std_error)
+            rng = np.random.RandomState(seed)
+            moments = self._accumulate(
+                payoffs, barriers, antithetic, rng, self.n_simulations
+            )
+        results = {}
+        for name, m in moments.items():
+            price, std_error = m.estimate(control_means.get(name))
+            results[name] = (float(discount * price), float(discount * std_error))
+        return results
+
+    def _default_barrier(self, barrier_type, barrier_level=None):
+        if barrier_level is None:
+            barrier_level = (
+                self.S * 0.9 if "down" in barrier_type else self.S * 1.1
+            )
+        return barrier_level
+
+    def _price_single(self, name, payoff, option_type, barriers=()):
+        controls = self._controls([name], option_type)
+        return self.price_payoffs({name: payoff}, barriers, controls=controls)[name]
+
+    def european_option_price(self, option_type="call"):
+        return self._price_single(
+            "european", self.european_payoff(option_type), option_type
+        )
+
+    def asian_option_price(self, option_type="call", averaging="arithmetic"):
+        return self._price_single(
+            f"asian_{averaging}", self.asian_payoff(option_type, averaging), option_type
+        )
+
+    def lookback_option_price(self, option_type="call"):
+        return self._price_single(
+            "lookback", self.lookback_payoff(option_type), option_type
+        )
+
+    def gradient(self, option_type="call", payoff="european", batch_size=2000, seed=None):
+        """
+        Price and pathwise gradient in S, K, T, r, sigma and q from adjoint
+        passes over the same antithetic normals as the price.
+
+        Each input is broadcast to one copy per path, so a single backward
+        pass per batch yields every path's derivatives and each gradient
+        entry gets a standard error. The barrier payoff is discontinuous
+        and has no pathwise gradient; its Greeks come from get_results.
+        """
+        payoffs = ("european", "asian_arithmetic", "asian_geometric", "lookback")
+        if payoff not in payoffs:
+            raise ValueError(f"payoff must be one of {payoffs}")
+        names = ("S", "K", "T", "r", "sigma", "q")
+        rng = np.random.RandomState(self.seed if seed is None else seed)
+        moments = RunningMoments()
+        for Z in self._normal_batches(rng, self.n_simulations, True, batch_size):
+            inputs = {
+                name: np.full(len(Z), float(getattr(self, name))) for name in names
+            }
+            function = partial(
+                _aad_monte_carlo, Z=Z, payoff=payoff, option_type=option_type
+            )
+            values, gradient = aad.value_and_gradient(function, **inputs)
+            samples = np.column_stack([values] + [gradient[name] for name in names])
+            moments.update(_pair_average(samples))
+        std_errors = np.sqrt(np.diag(moments.variance) / moments.count)
+        return {
+            "price": float(moments.mean[0]),
+            "std_error": float(std_errors[0]),
+            "gradient": dict(zip(names, map(float, moments.mean[1:]))),
+            "gradient_std_error": dict(zip(names, map(float, std_errors[1:]))),
+        }
+
+    def barrier_pde_price(self, option_type, barrier_type, barrier_level):
+        """
+        Crank-Nicolson price of the same barrier: observed at each of the
+        n_steps simulation dates, or continuously when a barrier correction
+        is in use.
+        """
+        model = FiniteDifferenceModel(
+            self.S, self.K, self.T, self.r, self.sigma, self.q,
+            n_time=2 * self.n_steps,
+        )
+        return model.price(
+            option_type,
+            barrier_type=barrier_type,
+            barrier_level=barrier_level,
+            monitoring_dates=None if self.barrier_correction else self.n_steps,
+        )
 
     def barrier_option_price(
         self,
         option_type="call",
         barrier_type="down-and-out",
         barrier_level=None,
+        engine="monte_carlo",
     ):
-        if barrier_level is None:
-            barrier_level = (
-                self.S * 0.9 if "down" in barrier_type else self.S * 1.1
-            )
-        paths = self._generate_paths()
-        final_prices = paths[:, -1]
-        if "down" in barrier_type:
-            barrier_hit = np.any(paths <= barrier_level, axis=1)
-        else:
-            barrier_hit = np.any(paths >= barrier_level, axis=1)
-        if option_type.lower() == "call":
-            base_payoffs = np.maximum(final_prices - self.K, 0)
-        else:
-            base_payoffs = np.maximum(self.K - final_prices, 0)
-        if "out" in barrier_type:
-            payoffs = np.where(barrier_hit, 0, base_payoffs)
-        else:
-            payoffs = np.where(barrier_hit, base_payoffs, 0)
-        discount = np.exp(-self.r * self.T)
-        price = discount * np.mean(payoffs)
-        std_error = discount * np.std(payoffs) / np.sqrt(self.n_simulations)
-        return float(price), float(std_error), float(barrier_level)
+        """
+        Returns (price, std_error, barrier_level). engine="pde" solves the
+        pricing PDE instead of simulating; its std_error is reported as 0.
+        """
+        barrier_level = self._default_barrier(barrier_type, barrier_level)
+        if engine == "pde":
+            price = self.barrier_pde_price(option_type, barrier_type, barrier_level)
+            return price, 0.0, float(barrier_level)
+        payoff, barrier = self.barrier_payoff(
+            option_type, barrier_type, barrier_level
+        )
+        price, std_error = self._price_single(
+            "barrier", payoff, option_type, [barrier]
+        )
+        return price, std_error, float(barrier_level)
 
     def get_results(self, option_type="call"):
         n_steps_calc = max(min(int(self.T * 252), 252), 21)
         self.n_steps = n_steps_calc
         self.dt = self.T / n_steps_calc
 
-        european_price, european_se = self.european_option_price(option_type)
-        asian_arith_price, asian_arith_se = self.asian_option_price(
-            option_type, "arithmetic"
+        barrier_type = "down-and-out" if option_type == "call" else "up-and-out"
+        barrier_level = self._default_barrier(barrier_type)
+        barrier_payoff, barrier = self.barrier_payoff(
+            option_type, barrier_type, barrier_level
         )
-        asian_geo_price, asian_geo_se = self.asian_option_price(
-            option_type, "geometric"
+        payoffs = {
+            "european": self.european_payoff(option_type),
+            "asian_arithmetic": self.asian_payoff(option_type, "arithmetic"),
+            "asian_geometric": self.asian_payoff(option_type, "geometric"),
+            "lookback": self.lookback_payoff(option_type),
+            "barrier": barrier_payoff,
+        }
+        controls = self._controls(payoffs, option_type)
+        methods = {}
+        for name in list(payoffs):
+            greeks = self.greek_payoffs(name, option_type, barrier_type, barrier_level)
+            for greek, (payoff, method) in greeks.items():
+                payoffs[f"{name}:{greek}"] = payoff
+                methods[f"{name}:{greek}"] = method
+        results = self.price_payoffs(
+            payoffs, barriers=[barrier], controls=controls, sensitivities=True
         )
-        lookback_price, lookback_se = self.lookback_option_price(option_type)
-        barrier_type = "down-and-out" if option_type == "call" else "up-and-out"
-        barrier_price, barrier_se, barrier_level = self.barrier_option_price(
-            option_type, barrier_type
+
+        output = {
+            "simulations": self.simulated_paths,
+            "time_steps": self.n_steps,
+            "sampler": self.sampler,
+            "control_variates": self.control_variates,
+        }
+        for name, (price, std_error) in results.items():
+            if ":" in name:
+                continue
+            output[name] = {"price": price, "std_error": std_error, "greeks": {}}
+            output[name].update(self.diagnostics.get(name, {}))
+        for key, method in methods.items():
+            name, greek = key.split(":")
+            value, std_error = results[key]
+            # Vega per 1% volatility move, as in the other models
+            scale = 0.01 if greek == "vega" else 1.0
+            output[name]["greeks"][greek] = {
+                "value": value * scale,
+                "std_error": std_error * scale,
+                "method": method,
+            }
+        if self.diagnostics:
+            output["simulations"] = max(d["paths"] for d in self.diagnostics.values())
+        output["barrier"]["barrier_type"] = barrier_type
+        output["barrier"]["barrier_level"] = float(barrier_level)
+        output["barrier"]["monitoring"] = (
+            "continuous" if self.barrier_correction else "discrete"
+        )
+        output["barrier"]["barrier_correction"] = self.barrier_correction
+        output["barrier"]["pde_price"] = (
+            self.barrier_pde_price(option_type, barrier_type, barrier_level)
+            if self.barrier_pde_check
+            else None
         )
+        return output
 
-        return {
+
+class LongstaffSchwartzModel(MonteCarloModel):
+    """
+    Least-squares Monte Carlo (Longstaff-Schwartz) for early exercise.
+
+    Walking back from expiry, the discounted realised cash flows of the
+    in-the-money paths are regressed on a basis of the state at each
+    exercise date, and paths whose exercise value beats the fitted
+    continuation value exercise there. Supports American/Bermudan
+    vanilla, Asian (exercise into the running average) and knock-out
+    barrier payoffs.
+
+    memory="full" regresses on the path matrix from _generate_paths.
+    memory="rolling" (vanilla only) keeps a single time slice in memory
+    and regenerates the paths backwards with a Brownian bridge, drawing
+    W_T first and then each earlier W conditionally on the later one.
+
+    Parameters:
+        S, K, T, r, sigma, q, n_simulations, n_steps, seed: as MonteCarloModel
+        basis: "laguerre" or "polynomial" regression basis
+        degree: Highest basis order
+        exercise_dates: Number of equally spaced exercise dates (None: every step)
+        memory: "full" or "rolling"
+    """
+
+    BASES = ("laguerre", "polynomial")
+    MEMORY_MODES = ("full", "rolling")
+
+    def __init__(
+        self,
+        S,
+        K,
+        T,
+        r,
+        sigma,
+        q=0,
+        n_simulations=50000,
+        n_steps=50,
+        seed=42,
+        basis="laguerre",
+        degree=3,
+        exercise_dates=None,
+        memory="full",
+    ):
+        super().__init__(
+            S, K, T, r, sigma, q,
+            n_simulations=n_simulations, n_steps=n_steps, seed=seed,
+        )
+        if basis not in self.BASES:
+            raise ValueError(f"basis must be one of {self.BASES}")
+        if memory not in self.MEMORY_MODES:
+            raise ValueError(f"memory must be one of {self.MEMORY_MODES}")
+        self.basis = basis
+        self.degree = degree
+        self.exercise_dates = exercise_dates
+        self.memory = memory
+
+    def _exercise_steps(self):
+        if self.exercise_dates is None:
+            return set(range(1, self.n_steps + 1))
+        dates = np.linspace(0, self.n_steps, self.exercise_dates + 1)[1:]
+        return set(np.round(dates).astype(int))
+
+    def _basis(self, x):
+        """Basis functions of x (state / strike), one column each."""
+        columns = [np.ones_like(x)]
+        if self.basis == "polynomial":
+            for _ in range(self.degree):
+                columns.append(columns[-1] * x)
+            return np.column_stack(columns)
+        # Weighted Laguerre polynomials, by the three-term recurrence
+        weight = np.exp(-0.5 * x)
+        previous, current = np.ones_like(x), 1 - x
+        laguerre = [previous, current]
+        for k in range(1, self.degree - 1):
+            previous, current = (
+                current,
+                ((2 * k + 1 - x) * current - k * previous) / (k + 1),
+            )
+            laguerre.append(current)
+        columns.extend(weight * polynomial for polynomial in laguerre[: self.degree])
+        return np.column_stack(columns)
+
+    def _states_full(self, extra=None):
+        """Yield (step, spot, extra state) backwards from the path matrix."""
+        paths = self._generate_paths()
+        states = extra(paths) if extra is not None else None
+        for k in range(self.n_steps, 0, -1):
+            yield k, paths[:, k], None if states is None else states[:, k]
+
+    def _states_rolling(self):
+        """Yield (step, spot, None) backwards via a backward Brownian bridge."""
+        rng = np.random.RandomState(self.seed)
+        n_half = self.n_simulations // 2
+        drift = self.r - self.q - 0.5 * self.sigma**2
+        Z = rng.standard_normal(n_half)
+        W = np.sqrt(self.T) * np.concatenate([Z, -Z])
+        for k in range(self.n_steps, 0, -1):
+            t = k * self.dt
+            yield k, self.S * np.exp(drift * t + self.sigma * W), None
+            # W(t - dt) | W(t) is normal with mean W(t)(t - dt)/t
+            earlier = t - self.dt
+            Z = rng.standard_normal(n_half)
+            W = W * earlier / t + np.sqrt(earlier * self.dt / t) * np.concatenate(
+                [Z, -Z]
+            )
+
+    def _longstaff_schwartz(self, states, exercise_value, features, immediate):
+        """
+        Backward induction over (step, spot, extra) states.
+
+        exercise_value(spot, extra) is the payoff if exercised then (zero
+        where exercise is impossible); features(spot, extra) the regression
+        matrix. Returns (price, std_error, early exercise count).
+        """
+        exercise_steps = self._exercise_steps()
+        step_discount = np.exp(-self.r * self.dt)
+        values = None
+        exercised = 0
+        for k, spot, extra in states:
+            exercise = exercise_value(spot, extra)
+            if values is None:
+                values = exercise
+                continue
+            values = values * step_discount
+            if k not in exercise_steps:
+                continue
+            itm = np.flatnonzero(exercise > 0)
+            if len(itm) <= self.degree + 1:
+                continue
+            X = features(spot[itm], None if extra is None else extra[itm])
+            coefficients, *_ = np.linalg.lstsq(X, values[itm], rcond=None)
+            exercise_now = itm[exercise[itm] > X @ coefficients]
+            values[exercise_now] = exercise[exercise_now]
+            exercised += len(exercise_now)
+        values = values * step_discount
+        moments = RunningMoments().update(_pair_average(values))
+        price, std_error = moments.estimate()
+        return max(price, immediate), std_error, exercised
+
+    def american_option_price(self, option_type="call"):
+        """Returns (price, std_error)."""
+        sign = 1.0 if option_type.lower() == "call" else -1.0
+        if self.memory == "rolling":
+            states = self._states_rolling()
+        else:
+            states = self._states_full()
+        price, std_error, _ = self._longstaff_schwartz(
+            states,
+            lambda spot, _: np.maximum(sign * (spot - self.K), 0),
+            lambda spot, _: self._basis(spot / self.K),
+            max(sign * (self.S - self.K), 0),
+        )
+        return price, std_error
+
+    def american_asian_price(self, option_type="call", averaging="arithmetic"):
+        """
+        Returns (price, std_error) for an Asian option exercisable into the
+        average of the fixings so far (including the initial price).
+        """
+        self._require_full_paths()
+        sign = 1.0 if option_type.lower() == "call" else -1.0
+        counts = np.arange(1, self.n_steps + 2)
+
+        def running(paths):
+            if averaging == "arithmetic":
+                return np.cumsum(paths, axis=1) / counts
+            return np.exp(np.cumsum(np.log(paths), axis=1) / counts)
+
+        def features(spot, average):
+            x, a = spot / self.K, average / self.K
+            return np.column_stack(
+                [self._basis(x), self._basis(a)[:, 1:], x * a]
+            )
+
+        price, std_error, _ = self._longstaff_schwartz(
+            self._states_full(running),
+            lambda _, average: np.maximum(sign * (average - self.K), 0),
+            features,
+            max(sign * (self.S - self.K), 0),
+        )
+        return price, std_error
+
+    def bermudan_barrier_price(
+        self, option_type="call", barrier_type="down-and-out", barrier_level=None
+    ):
+        """
+        Returns (price, std_error, barrier_level) for an early-exercisable
+        knock-out, monitored at every simulation step.
+        """
+        if not barrier_type.endswith("-out"):
+            raise ValueError("Only knock-out barriers support early exercise")
+        self._require_full_paths()
+        barrier_level = self._default_barrier(barrier_type, barrier_level)
+        direction = "down" if "down" in barrier_type else "up"
+        sign = 1.0 if option_type.lower() == "call" else -1.0
+
+        def alive(paths):
+            crossed = self._crossed(paths, direction, barrier_level)
+            return ~np.logical_or.accumulate(crossed, axis=1)
+
+        price, std_error, _ = self._longstaff_schwartz(
+            self._states_full(alive),
+            lambda spot, live: live * np.maximum(sign * (spot - self.K), 0),
+            lambda spot, _: self._basis(spot / self.K),
+            max(sign * (self.S - self.K), 0)
+            if not self._crossed(self.S, direction, barrier_level)
+            else 0.0,
+        )
+        return price, std_error, float(barrier_level)
+
+    def _require_full_paths(self):
+        if self.memory != "full":
+            raise ValueError("Path-dependent payoffs need memory='full'")
+
+    def get_results(self, option_type="call"):
+        barrier_type = "down-and-out" if option_type == "call" else "up-and-out"
+        price, std_error = self.american_option_price(option_type)
+        output = {
             "simulations": self.n_simulations,
             "time_steps": self.n_steps,
-            "european": {"price": european_price, "std_error": european_se},
-            "asian_arithmetic": {
-                "price": asian_arith_price,
-                "std_error": asian_arith_se,
-            },
-            "asian_geometric": {
-                "price": asian_geo_price,
-                "std_error": asian_geo_se,
-            },
-            "lookback": {"price": lookback_price, "std_error": lookback_se},
-            "barrier": {
-                "price": barrier_price,
-                "std_error": barrier_se,
-                "barrier_type": barrier_type,
-                "barrier_level": barrier_level,
-            },
+            "basis": self.basis,
+            "degree": self.degree,
+            "exercise_dates": self.exercise_dates or self.n_steps,
+            "memory": self.memory,
+            "american": {"price": price, "std_error": std_error},
         }
+        if self.memory == "full":
+            price, std_error = self.american_asian_price(option_type)
+            output["american_asian"] = {"price": price, "std_error": std_error}
+            price, std_error, level = self.bermudan_barrier_price(
+                option_type, barrier_type
+            )
+            output["bermudan_barrier"] = {
+                "price": price,
+                "std_error": std_error,
+                "barrier_type": barrier_type,
+                "barrier_level": level,
+            }
+        return output
+
+
+def _tree_rollback(S, K, sign, u, d, p, discount, n_steps, american, final_step=None):
+    """
+    Roll back binomial trees grown two steps before t = 0.
+
+    All parameters are (m, 1) columns, one row per contract, broadcast
+    across the node axis. Each tree starts at t = -2dt from S / (u d), so at
+    t = 0 it has the three nodes S u/d, S and S d/u, and the centre node at
+    t = 2dt is S u d (exactly S for CRR). Price, delta, gamma and theta are
+    all read from these nodes, and the subtree rooted at (t = 0, S) is
+    exactly the n-step tree, so its early-exercise node count is that of
+    the plain n-step tree. The three middle nodes at t = 2dt are kept so
+    theta can be read at S even when u d != 1 (Leisen-Reimer).
+
+    Keeping a single value array, node stock prices at step k are the
+    first k + 1 terminal prices scaled by u^-(n - k), so no (n+1) x (n+1)
+    tree is ever stored. final_step(stock), if given, replaces the
+    rollback into the last step before expiry (BBS).
+
+    Returns a dict with the (m, 3) t = 0 values, the (stocks, values)
+    middle nodes at t = 2dt (None for trees of fewer than two steps) and
+    the per-contract early-exercise node counts.
+    """
+    n = n_steps + 2
+    j = np.arange(n + 1)
+    terminal = S / (u * d) * u ** (n - j) * d**j
+    values = np.maximum(sign * (terminal - K), 0)
+    forward = (terminal[:, 1:4], values[:, 1:4]) if n == 4 else None
+    early_exercise = np.zeros(len(values), dtype=int)
+    for k in range(n - 1, 1, -1):
+        smooth = final_step is not None and k == n - 1
+        if american or smooth or k == 4:
+            stock = terminal[:, : k + 1] * u ** (k - n)
+        if smooth:
+            values = final_step(stock)
+        else:
+            values = discount * (p * values[:, :-1] + (1 - p) * values[:, 1:])
+        if american:
+            exercise = np.maximum(sign * (stock - K), 0)
+            # Only nodes 1..k-1 belong to the subtree rooted at (0, S)
+            early_exercise += np.count_nonzero(
+                exercise[:, 1:k] > values[:, 1:k], axis=1
+            )
+            values = np.maximum(values, exercise)
+        if k == 4:
+            forward = (stock[:, 1:4], values[:, 1:4])
+    return {
+        "values": values,
+        "forward": forward,
+        "early_exercise_nodes": early_exercise,
+    }
+
+
+def _tree_greeks(S, u, d, dt, rollback):
+    """
+    Delta, gamma and theta (per day) arrays from a _tree_rollback result;
+    S, u, d and dt are (m, 1) columns.
+    """
+    m = len(rollback["values"])
+    S, u, d, dt = (np.broadcast_to(x, (m, 1))[:, 0] for x in (S, u, d, dt))
+    v_up, v_mid, v_down = rollback["values"].T
+    s_up, s_down = S * u / d, S * d / u
+    delta = (v_up - v_down) / (s_up - s_down)
+    gamma = (
+        (v_up - v_mid) / (s_up - S) - (v_mid - v_down) / (S - s_down)
+    ) / (0.5 * (s_up - s_down))
+    if rollback["forward"] is None:
+        return delta, gamma, np.zeros_like(v_mid)
+    # Value at (t = 2dt, S) from a quadratic through the middle nodes,
+    # which reduces to the centre node when u d = 1
+    (s0, s1, s2), (v0, v1, v2) = (a.T for a in rollback["forward"])
+    forward_value = (
+        v0 * (S - s1) * (S - s2) / ((s0 - s1) * (s0 - s2))
+        + v1 * (S - s0) * (S - s2) / ((s1 - s0) * (s1 - s2))
+        + v2 * (S - s0) * (S - s1) / ((s2 - s0) * (s2 - s1))
+    )
+    return delta, gamma, (forward_value - v_mid) / (2 * dt) / 365
 
 
 class BinomialModel:
     """
-    Cox-Ross-Rubinstein Binomial Tree model.
+    Binomial Tree model.
 
     Supports both European and American option pricing
     with early exercise valuation.
+
+    Lattice methods:
+        crr: Cox-Ross-Rubinstein (default)
+        leisen_reimer: Leisen-Reimer with Peizer-Pratt inversion; converges
+            smoothly at second order (n_steps is rounded up to odd)
+        bbs: CRR with the last step replaced by Black-Scholes prices
+            (Broadie-Detemple), which removes most of the CRR oscillation
+
+    With richardson=True prices are extrapolated from this tree and one
+    with half the steps (BBS + Richardson is the classic BBSR scheme).
+    Extrapolation needs an error that shrinks smoothly with n, so it is
+    only available for bbs and leisen_reimer: the CRR error oscillates
+    with step parity and extrapolating it makes the price worse.
     """
 
-    def __init__(self, S, K, T, r, sigma, q=0, n_steps=500):
+    METHODS = ("crr", "leisen_reimer", "bbs")
+
+    def __init__(
+        self, S, K, T, r, sigma, q=0, n_steps=500, method="crr", richardson=False
+    ):
+        if method not in self.METHODS:
+            raise ValueError(f"method must be one of {self.METHODS}")
+        if richardson and method == "crr":
+            raise ValueError("richardson requires method 'bbs' or 'leisen_reimer'")
+        if method == "leisen_reimer" and n_steps % 2 == 0:
+            n_steps += 1
         self.S = S
         self.K = K
         self.T = max(T, 1e-10)
@@ -292,112 +1660,138 @@ class BinomialModel:
         self.sigma = max(sigma, 1e-10)
         self.q = q
         self.n_steps = n_steps
+        self.method = method
+        self.richardson = richardson
         self.dt = self.T / n_steps
-        self.u = np.exp(sigma * np.sqrt(self.dt))
-        self.d = 1 / self.u
-        self.p = (np.exp((r - q) * self.dt) - self.d) / (self.u - self.d)
+        if method == "leisen_reimer":
+            self._leisen_reimer_parameters()
+        else:
+            self.u = np.exp(sigma * np.sqrt(self.dt))
+            self.d = 1 / self.u
+            self.p = (np.exp((r - q) * self.dt) - self.d) / (self.u - self.d)
         self.discount = np.exp(-r * self.dt)
+        self._rollbacks = {}
+        self._coarse = None
 
-    def _build_terminal_stock_prices(self):
-        n = self.n_steps
-        return self.S * (self.u ** np.arange(n, -1, -1)) * (
-            self.d ** np.arange(0, n + 1)
+    @staticmethod
+    def _peizer_pratt(z, n):
+        """Peizer-Pratt method 2 inversion of the normal CDF onto n steps."""
+        return 0.5 + np.sign(z) * 0.5 * np.sqrt(
+            1 - np.exp(-((z / (n + 1 / 3 + 0.1 / (n + 1))) ** 2) * (n + 1 / 6))
         )
 
-    def european_option_price(self, option_type="call"):
-        n = self.n_steps
-        stock_prices = self._build_terminal_stock_prices()
-        if option_type.lower() == "call":
-            option_values = np.maximum(stock_prices - self.K, 0)
-        else:
-            option_values = np.maximum(self.K - stock_prices, 0)
-        for i in range(n - 1, -1, -1):
-            option_values = self.discount * (
-                self.p * option_values[:-1] + (1 - self.p) * option_values[1:]
+    def _leisen_reimer_parameters(self):
+        bs = BlackScholesModel(self.S, self.K, self.T, self.r, self.sigma, self.q)
+        growth = np.exp((self.r - self.q) * self.dt)
+        self.p = self._peizer_pratt(bs.d2, self.n_steps)
+        p_bar = self._peizer_pratt(bs.d1, self.n_steps)
+        self.u = growth * p_bar / self.p
+        self.d = (growth - self.p * self.u) / (1 - self.p)
+
+    def _extended_rollback(self, option_type="call", american=True):
+        """
+        One-row _tree_rollback for this contract, memoized per (option
+        type, exercise style); values are flattened to the three t = 0
+        nodes.
+        """
+        key = (option_type.lower(), american)
+        if key in self._rollbacks:
+            return self._rollbacks[key]
+
+        def black_scholes_step(stock):
+            # Smooth the final step with the Black-Scholes price over dt
+            return BatchBlackScholesModel(
+                stock, self.K, self.dt, self.r, self.sigma, self.q, option_type
+            ).price()
+
+        sign = 1.0 if option_type.lower() == "call" else -1.0
+        rollback = _tree_rollback(
+            *(
+                np.full((1, 1), x, dtype=float)
+                for x in (self.S, self.K, sign, self.u, self.d, self.p, self.discount)
+            ),
+            self.n_steps,
+            american,
+            black_scholes_step if self.method == "bbs" else None,
+        )
+        self._rollbacks[key] = rollback = {
+            "values": rollback["values"][0],
+            "rollback": rollback,
+            "early_exercise_nodes": int(rollback["early_exercise_nodes"][0]),
+        }
+        return rollback
+
+    def _extrapolate(self, price, option_type, american):
+        """Two-point Richardson extrapolation against a half-step tree."""
+        if not self.richardson:
+            return price
+        if self._coarse is None:
+            self._coarse = BinomialModel(
+                self.S, self.K, self.T, self.r, self.sigma, self.q,
+                max(self.n_steps // 2, 1), self.method,
             )
-        return float(option_values[0])
+        coarse = self._coarse
+        rollback = coarse._extended_rollback(option_type, american)
+        coarse_price = float(rollback["values"][1])
+        # Leisen-Reimer errors shrink like 1/n^2, BBS like 1/n
+        order = 2 if self.method == "leisen_reimer" else 1
+        fine_weight = self.n_steps**order
+        coarse_weight = coarse.n_steps**order
+        return (fine_weight * price - coarse_weight * coarse_price) / (
+            fine_weight - coarse_weight
+        )
+
+    def european_option_price(self, option_type="call"):
+        rollback = self._extended_rollback(option_type, american=False)
+        return float(
+            self._extrapolate(rollback["values"][1], option_type, american=False)
+        )
 
     def american_option_price(self, option_type="call"):
-        n = self.n_steps
-        stock_tree = np.zeros((n + 1, n + 1))
-        stock_tree[0, 0] = self.S
-        for i in range(1, n + 1):
-            stock_tree[0:i, i] = stock_tree[0:i, i - 1] * self.u
-            stock_tree[i, i] = stock_tree[i - 1, i - 1] * self.d
-        option_tree = np.zeros((n + 1, n + 1))
-        if option_type.lower() == "call":
-            option_tree[:, n] = np.maximum(stock_tree[:, n] - self.K, 0)
-        else:
-            option_tree[:, n] = np.maximum(self.K - stock_tree[:, n], 0)
-        early_exercise_count = 0
-        for i in range(n - 1, -1, -1):
-            continuation = self.discount * (
-                self.p * option_tree[0 : i + 1, i + 1]
-                + (1 - self.p) * option_tree[1 : i + 2, i + 1]
-            )
-            if option_type.lower() == "call":
-                exercise = np.maximum(stock_tree[0 : i + 1, i] - self.K, 0)
-            else:
-                exercise = np.maximum(self.K - stock_tree[0 : i + 1, i], 0)
-            early_exercise_count += int(np.sum(exercise > continuation))
-            option_tree[0 : i + 1, i] = np.maximum(continuation, exercise)
-        return float(option_tree[0, 0]), early_exercise_count
+        rollback = self._extended_rollback(option_type, american=True)
+        price = self._extrapolate(rollback["values"][1], option_type, american=True)
+        return float(price), rollback["early_exercise_nodes"]
 
-    def calculate_greeks(self, option_type="call", american=True):
-        if american:
-            price_func = lambda m: m.american_option_price(option_type)[0]
-        else:
-            price_func = lambda m: m.european_option_price(option_type)
-        base_price = price_func(self)
-        dS = self.S * 0.01
-        model_up = BinomialModel(
-            self.S + dS, self.K, self.T, self.r, self.sigma, self.q, self.n_steps
-        )
-        model_down = BinomialModel(
-            self.S - dS, self.K, self.T, self.r, self.sigma, self.q, self.n_steps
-        )
-        delta = (price_func(model_up) - price_func(model_down)) / (2 * dS)
-        gamma = (price_func(model_up) - 2 * base_price + price_func(model_down)) / (
-            dS**2
-        )
-        if self.T > 1 / 365:
-            dT = 1 / 365
-            model_theta = BinomialModel(
+    def _vega_bump_prices(self, option_type, american, d_sigma):
+        if self.method == "crr":
+            # One batched sweep for both bumps
+            bumped = BatchBinomialModel(
                 self.S,
                 self.K,
-                self.T - dT,
+                self.T,
                 self.r,
-                self.sigma,
+                [self.sigma + d_sigma, self.sigma - d_sigma],
                 self.q,
+                option_type,
                 self.n_steps,
             )
-            theta = price_func(model_theta) - base_price
-        else:
-            theta = 0
-        d_sigma = 0.01
-        model_vega_up = BinomialModel(
-            self.S,
-            self.K,
-            self.T,
-            self.r,
-            self.sigma + d_sigma,
-            self.q,
-            self.n_steps,
-        )
-        model_vega_down = BinomialModel(
-            self.S,
-            self.K,
-            self.T,
-            self.r,
-            self.sigma - d_sigma,
-            self.q,
-            self.n_steps,
+            if american:
+                return bumped.american_option_price()[0]
+            return bumped.european_option_price()
+        prices = []
+        for sigma in (self.sigma + d_sigma, self.sigma - d_sigma):
+            model = BinomialModel(
+                self.S, self.K, self.T, self.r, sigma, self.q, self.n_steps, self.method
+            )
+            rollback = model._extended_rollback(option_type, american)
+            prices.append(rollback["values"][1])
+        return prices
+
+    def calculate_greeks(self, option_type="call", american=True):
+        """
+        Delta, gamma and theta from the extended tree, vega from a single
+        batched rollback of the sigma +/- 1% bumps.
+        """
+        rollback = self._extended_rollback(option_type, american)
+        delta, gamma, theta = _tree_greeks(
+            self.S, self.u, self.d, self.dt, rollback["rollback"]
         )
-        vega = (price_func(model_vega_up) - price_func(model_vega_down)) / 2
+        vega_up, vega_down = self._vega_bump_prices(option_type, american, 0.01)
+        vega = (vega_up - vega_down) / 2
         return {
-            "delta": float(delta),
-            "gamma": float(gamma),
-            "theta": float(theta),
+            "delta": float(delta[0]),
+            "gamma": float(gamma[0]),
+            "theta": float(theta[0]),
             "vega": float(vega),
         }
 
@@ -406,6 +1800,11 @@ class BinomialModel:
         american_price, early_exercise_nodes = self.american_option_price(option_type)
         early_exercise_premium = american_price - european_price
         greeks = self.calculate_greeks(option_type, american=True)
+        bs_price = float(
+            BlackScholesModel(self.S, self.K, self.T, self.r, self.sigma, self.q).price(
+                option_type
+            )
+        )
         return {
             "tree_steps": self.n_steps,
             "up_factor": float(self.u),
@@ -416,4 +1815,117 @@ class BinomialModel:
             "early_exercise_premium": early_exercise_premium,
             "early_exercise_nodes": early_exercise_nodes,
             "greeks": greeks,
+            "method": self.method,
+            "richardson": self.richardson,
+            "bs_european_price": bs_price,
+            "bs_error": european_price - bs_price,
+        }
+
+    def gradient(self, option_type="call", american=True):
+        """
+        Tree price and its gradient in S, K, T, r, sigma and q from one
+        adjoint pass back through the CRR rollback.
+        """
+        if self.method != "crr":
+            raise ValueError("Adjoint gradients are only available for method='crr'")
+        function = partial(
+            _aad_binomial,
+            n_steps=self.n_steps,
+            option_type=option_type,
+            american=american,
+        )
+        price, gradient = aad.value_and_gradient(
+            function,
+            S=self.S, K=self.K, T=self.T, r=self.r, sigma=self.sigma, q=self.q,
+        )
+        return {"price": float(price), "gradient": _float_dict(gradient)}
+
+
+class BatchBinomialModel:
+    """
+    Cox-Ross-Rubinstein trees for many contracts in one vectorized sweep.
+
+    Contracts are rolled back together as a 2-D array with one row per
+    contract. Every contract uses the same number of steps; contracts with
+    different expiries get their own dt, u, d and p, so a full chain of
+    strikes and expiries for an underlying is priced in a single pass.
+    The rollback is _tree_rollback, shared with BinomialModel (which runs
+    it as a one-row batch).
+
+    Parameters:
+        S, K, T, r, sigma, q: Scalars or arrays (broadcast together)
+        option_type: "call"/"put", or an array of them
+        n_steps: Number of tree steps shared by all contracts
+    """
+
+    FIELDS = ("S", "K", "T", "r", "sigma", "q", "option_type")
+
+    def __init__(self, S, K, T, r, sigma, q=0, option_type="call", n_steps=500):
+        arrays = np.broadcast_arrays(
+            np.asarray(S, dtype=float),
+            np.asarray(K, dtype=float),
+            np.maximum(np.asarray(T, dtype=float), 1e-10),
+            np.asarray(r, dtype=float),
+            np.maximum(np.asarray(sigma, dtype=float), 1e-10),
+            np.asarray(q, dtype=float),
+            BatchBlackScholesModel._is_call(option_type),
+        )
+        self.shape = arrays[0].shape
+        # Parameters are stored as (m, 1) columns so they broadcast across
+        # the node axis of the (m, nodes) value array
+        self.S, self.K, self.T, self.r, self.sigma, self.q, self.is_call = (
+            a.reshape(-1, 1) for a in arrays
+        )
+        self.n_steps = n_steps
+        self.dt = self.T / n_steps
+        self.u = np.exp(self.sigma * np.sqrt(self.dt))
+        self.d = 1 / self.u
+        self.p = (np.exp((self.r - self.q) * self.dt) - self.d) / (self.u - self.d)
+        self.discount = np.exp(-self.r * self.dt)
+        self._sign = np.where(self.is_call, 1.0, -1.0)
+
+    @classmethod
+    def from_records(cls, contracts, n_steps=500):
+        """Build a batch from a structured array, DataFrame or dict."""
+        return cls(**_record_columns(contracts, cls.FIELDS), n_steps=n_steps)
+
+    def _rollback(self, american):
+        return _tree_rollback(
+            self.S, self.K, self._sign, self.u, self.d, self.p, self.discount,
+            self.n_steps, american,
+        )
+
+    def calculate_greeks(self, american=True):
+        """
+        Prices and delta, gamma and theta (per day) arrays read from the
+        extended trees, all from a single rollback.
+        """
+        rollback = self._rollback(american)
+        delta, gamma, theta = _tree_greeks(self.S, self.u, self.d, self.dt, rollback)
+        return rollback["values"][:, 1].reshape(self.shape), {
+            "delta": delta.reshape(self.shape),
+            "gamma": gamma.reshape(self.shape),
+            "theta": theta.reshape(self.shape),
+        }
+
+    def european_option_price(self):
+        return self._rollback(american=False)["values"][:, 1].reshape(self.shape)
+
+    def american_option_price(self):
+        """Returns (prices, early-exercise node counts) as arrays."""
+        rollback = self._rollback(american=True)
+        return (
+            rollback["values"][:, 1].reshape(self.shape),
+            rollback["early_exercise_nodes"].reshape(self.shape),
+        )
+
+    def get_results(self):
+        european_price = self.european_option_price()
+        american_price, early_exercise_nodes = self.american_option_price()
+        return {
+            "tree_steps": self.n_steps,
+            "european_price": european_price,
+            "american_price": american_price,
+            "early_exercise_premium": american_price - european_price,
+            "early_exercise_nodes": early_exercise_nodes,
         }
@@ -0,0 +1,278 @@
+"""
+Response Formats
+
+Content negotiation for API payloads. Besides plain JSON, clients may ask
+for:
+
+    application/vnd.option-pricer.columnar+json
+        JSON in which every list of records with identical keys is
+        replaced by a table, {"__columns__": {key: [values, ...]}}, so
+        each key name is sent once instead of once per row.
+
+    application/vnd.option-pricer.typed-buffers
+        The columnar payload with every numeric array moved into a
+        little-endian typed buffer. Add "; precision=float32" to the Accept
+        header to get float32 instead of float64 buffers for float columns;
+        integer columns that do not fit int32 are always sent as f8. Layout:
+
+            bytes 0-3    b"OPTB"
+            byte  4      format version (1)
+            bytes 5-7    reserved
+            bytes 8-11   header length H (uint32)
+            bytes 12..   H bytes of UTF-8 JSON header, zero-padded to a
+                         multiple of 8
+            ...          buffers, each starting on an 8-byte boundary
+
+        The header is {"payload": ..., "buffers": [...]}. Inside payload,
+        each packed array is {"__buffer__": i}, and buffers[i] gives its
+        "dtype" ("f8", "f4", "i4" or "bool"), its "offset" from the start
+        of the buffer section, its "length" and, for float arrays,
+        "nullable". NaN in a nullable array stands for null.
+
+Responses are gzip-compressed when the client accepts it, or
+brotli-compressed if the optional brotli package is installed and "br"
+is accepted.
+"""
+
+import gzip
+import json
+import struct
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON = "application/json"
+COLUMNAR = "application/vnd.option-pricer.columnar+json"
+TYPED_BUFFERS = "application/vnd.option-pricer.typed-buffers"
+MEDIA_TYPES = (JSON, COLUMNAR, TYPED_BUFFERS)
+
+MAGIC = b"OPTB"
+VERSION = 1
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# Shorter numeric lists stay inline in the JSON header
+MIN_BUFFER_LENGTH = 8
+
+_INT32 = (-(2**31), 2**31 - 1)
+
+# Largest magnitude up to which float32 represents every integer
+_F4_EXACT = 2**24
+
+
+def _parse_header(value):
+    """Split an Accept-style header into (token, params, q) in header order."""
+    items = []
+    for part in (value or "").split(","):
+        fields = [f.strip() for f in part.split(";")]
+        if not fields[0]:
+            continue
+        params = {}
+        for field in fields[1:]:
+            name, _, val = field.partition("=")
+            params[name.strip().lower()] = val.strip().strip('"')
+        try:
+            q = float(params.pop("q", 1))
+        except ValueError:
+            q = 0.0
+        items.append((fields[0].lower(), params, q))
+    return items
+
+
+def negotiate(accept):
+    """
+    Pick the response media type for an Accept header.
+
+    Returns (media_type, params). Anything not naming one of MEDIA_TYPES,
+    including a missing header or */*, gets JSON.
+    """
+    best = (JSON, {}, 0.0)
+    for media_type, params, q in _parse_header(accept):
+        if media_type in MEDIA_TYPES and q > best[2]:
+            best = (media_type, params, q)
+    return best[0], best[1]
+
+
+def _is_table(value):
+    if not value or not all(isinstance(row, dict) for row in value):
+        return False
+    keys = value[0].keys()
+    return all(row.keys() == keys for row in value)
+
+
+def to_columnar(payload):
+    """Replace every list of same-keyed dicts in payload with a table."""
+    if isinstance(payload, dict):
+        return {key: to_columnar(value) for key, value in payload.items()}
+    if isinstance(payload, (list, tuple)):
+        if _is_table(payload):
+            columns = {key: [row[key] for row in payload] for key in payload[0]}
+            return {"__columns__": {k: to_columnar(v) for k, v in columns.items()}}
+        return [to_columnar(value) for value in payload]
+    return payload
+
+
+def _buffer_dtype(values, float32):
+    """Typed-buffer dtype for a list, or None if it must stay JSON."""
+    kinds = set()
+    for v in values:
+        if v is None:
+            kinds.add("none")
+        elif isinstance(v, (bool, np.bool_)):
+            kinds.add("bool")
+        elif isinstance(v, (int, np.integer)):
+            kinds.add("int")
+        elif isinstance(v, (float, np.floating)):
+            kinds.add("float")
+        else:
+            return None
+    if kinds == {"bool"}:
+        return "bool"
+    if not kinds or not kinds <= {"int", "float", "none"}:
+        return None
+    ints = [v for v in values if isinstance(v, (int, np.integer))]
+    if kinds == {"int"} and _INT32[0] <= min(ints) and max(ints) <= _INT32[1]:
+        return "i4"
+    # Only true float columns are narrowed: integers (counts, timestamps)
+    # stay exact in f8, and so do floats mixed with integers beyond f4's
+    # 24-bit mantissa
+    if float32 and "float" in kinds and all(abs(v) <= _F4_EXACT for v in ints):
+        return "f4"
+    return "f8"
+
+
+class _BufferWriter:
+    def __init__(self, float32):
+        self.float32 = float32
+        self.specs = []
+        self.chunks = []
+        self.size = 0
+
+    def pack(self, payload):
+        if isinstance(payload, dict):
+            return {key: self.pack(value) for key, value in payload.items()}
+        if isinstance(payload, (list, tuple)):
+            dtype = None
+            if len(payload) >= MIN_BUFFER_LENGTH:
+                dtype = _buffer_dtype(payload, self.float32)
+            if dtype is None:
+                return [self.pack(value) for value in payload]
+            return self._add(payload, dtype)
+        return payload
+
+    def _add(self, values, dtype):
+        spec = {"dtype": dtype, "offset": self.size, "length": len(values)}
+        if dtype == "bool":
+            data = np.asarray(values, dtype=np.uint8)
+        elif dtype == "i4":
+            data = np.asarray(values, dtype="<i4")
+        else:
+            nullable = any(v is None for v in values)
+            if nullable:
+                values = [np.nan if v is None else v for v in values]
+            data = np.asarray(values, dtype="<f4" if dtype == "f4" else "<f8")
+            spec["nullable"] = nullable
+        raw = data.tobytes()
+        padding = -len(raw) % 8
+        self.chunks.append(raw + b"\0" * padding)
+        self.size += len(raw) + padding
+        self.specs.append(spec)
+        return {"__buffer__": len(self.specs) - 1}
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    return json.dumps(payload, separators=(",", ":"), default=_json_default).encode()
+
+
+def encode_typed_buffers(payload, float32=False):
+    """Serialize payload to the typed-buffer binary format."""
+    writer = _BufferWriter(float32)
+    tree = writer.pack(to_columnar(payload))
+    header = dumps({"payload": tree, "buffers": writer.specs})
+    header_size = len(header)
+    header += b"\0" * (-(12 + header_size) % 8)
+    prefix = MAGIC + struct.pack("<B3xI", VERSION, header_size)
+    return b"".join([prefix, header] + writer.chunks)
+
+
+def decode_typed_buffers(body):
+    """Inverse of encode_typed_buffers, with tables left in columnar form."""
+    if body[:4] != MAGIC:
+        raise ValueError("Not a typed-buffer payload")
+    version, header_size = struct.unpack_from("<B3xI", body, 4)
+    if version != VERSION:
+        raise ValueError(f"Unsupported typed-buffer version {version}")
+    header = json.loads(body[12 : 12 + header_size])
+    start = 12 + header_size + (-(12 + header_size) % 8)
+    dtypes = {"f8": "<f8", "f4": "<f4", "i4": "<i4", "bool": "u1"}
+
+    def unpack(node):
+        if isinstance(node, dict):
+            if "__buffer__" in node and len(node) == 1:
+                spec = header["buffers"][node["__buffer__"]]
+                data = np.frombuffer(
+                    body, dtypes[spec["dtype"]], spec["length"], start + spec["offset"]
+                )
+                if spec["dtype"] == "bool":
+                    return data.astype(bool).tolist()
+                values = data.tolist()
+                if spec.get("nullable"):
+                    values = [None if v != v else v for v in values]
+                return values
+            return {key: unpack(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [unpack(value) for value in node]
+        return node
+
+    return unpack(header["payload"])
+
+
+def compress(body, accept_encoding):
+    """Compress body for the client's Accept-Encoding; returns (body, encoding)."""
+    if len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    accepted = {
+        token: q for token, _, q in _parse_header(accept_encoding) if q > 0
+    }
+    if brotli is not None and "br" in accepted:
+        return brotli.compress(body, quality=5), "br"
+    if "gzip" in accepted or "*" in accepted:
+        return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
+
+
+def render(payload, accept=None, accept_encoding=None):
+    """
+    Encode payload for the client's Accept and Accept-Encoding headers.
+
+    Returns (body, headers) ready to be wrapped in an HTTP response.
+    """
+    media_type, params = negotiate(accept)
+    if media_type == TYPED_BUFFERS:
+        body = encode_typed_buffers(
+            payload, float32=params.get("precision") == "float32"
+        )
+        content_type = media_type
+    else:
+        if media_type == COLUMNAR:
+            payload = to_columnar(payload)
+        body = dumps(payload)
+        content_type = f"{media_type}; charset=utf-8"
+    body, encoding = compress(body, accept_encoding)
+    headers = {"Content-Type": content_type, "Vary": "Accept, Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return body, headers
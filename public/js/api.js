@@ -5,14 +5,30 @@
 const API = {
     BASE_URL: '/api',
 
-    async _fetch(endpoint, params = {}) {
+    // Response formats the server can negotiate (see lib/response_format.py)
+    MEDIA_TYPES: {
+        json: 'application/json',
+        columnar: 'application/vnd.option-pricer.columnar+json',
+        binary: 'application/vnd.option-pricer.typed-buffers',
+    },
+
+    // Format requested for the large chain and history payloads
+    BULK_FORMAT: 'binary',
+
+    async _fetch(endpoint, params = {}, format = 'json', body = null) {
         const url = new URL(this.BASE_URL + endpoint, window.location.origin);
         Object.entries(params).forEach(([k, v]) => {
             if (v != null && v !== '') url.searchParams.set(k, v);
         });
 
-        const response = await fetch(url.toString());
-        const data = await response.json();
+        const init = { headers: { Accept: this._accept(format) } };
+        if (body != null) {
+            init.method = 'POST';
+            init.headers['Content-Type'] = 'application/json';
+            init.body = JSON.stringify(body);
+        }
+        const response = await fetch(url.toString(), init);
+        const data = await this._decode(response);
 
         if (!response.ok) {
             throw new Error(data.error || `Request failed with status ${response.status}`);
@@ -21,8 +37,77 @@ const API = {
         return data;
     },
 
+    _accept(format) {
+        const json = this.MEDIA_TYPES.json;
+        if (format === 'json') return json;
+        return `${this.MEDIA_TYPES[format]}, ${json};q=0.5`;
+    },
+
+    async _decode(response) {
+        const type = (response.headers.get('Content-Type') || '').split(';')[0].trim();
+        if (type === this.MEDIA_TYPES.binary) {
+            return this.toRecords(this.decodeTypedBuffers(await response.arrayBuffer()));
+        }
+        const data = await response.json();
+        return type === this.MEDIA_TYPES.columnar ? this.toRecords(data) : data;
+    },
+
+    /**
+     * Decode a typed-buffer payload. Numeric arrays come back as typed
+     * arrays viewing the response buffer (no copy), except nullable ones,
+     * whose NaNs are turned back into nulls. Buffers are little-endian,
+     * which is the byte order of every platform browsers run on.
+     */
+    decodeTypedBuffers(buffer) {
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== 'OPTB' || view.getUint8(4) !== 1) {
+            throw new Error('Unsupported typed-buffer payload');
+        }
+        const headerSize = view.getUint32(8, true);
+        const header = JSON.parse(
+            new TextDecoder().decode(new Uint8Array(buffer, 12, headerSize))
+        );
+        const start = Math.ceil((12 + headerSize) / 8) * 8;
+        const arrays = { f8: Float64Array, f4: Float32Array, i4: Int32Array, bool: Uint8Array };
+
+        const unpack = (node) => {
+            if (Array.isArray(node)) return node.map(unpack);
+            if (node === null || typeof node !== 'object') return node;
+            if ('__buffer__' in node && Object.keys(node).length === 1) {
+                const spec = header.buffers[node.__buffer__];
+                const data = new arrays[spec.dtype](buffer, start + spec.offset, spec.length);
+                if (spec.dtype === 'bool') return Array.from(data, Boolean);
+                if (spec.nullable) return Array.from(data, v => (Number.isNaN(v) ? null : v));
+                return data;
+            }
+            return Object.fromEntries(Object.entries(node).map(([k, v]) => [k, unpack(v)]));
+        };
+        return unpack(header.payload);
+    },
+
+    /** Expand columnar tables ({"__columns__": {...}}) back into row objects. */
+    toRecords(node) {
+        if (Array.isArray(node)) return node.map(v => this.toRecords(v));
+        if (node === null || typeof node !== 'object' || ArrayBuffer.isView(node)) return node;
+        if ('__columns__' in node && Object.keys(node).length === 1) {
+            const columns = Object.entries(node.__columns__).map(
+                ([k, v]) => [k, this.toRecords(v)]
+            );
+            const length = columns.length ? columns[0][1].length : 0;
+            const rows = new Array(length);
+            for (let i = 0; i < length; i++) {
+                const row = {};
+                for (const [k, values] of columns) row[k] = values[i];
+                rows[i] = row;
+            }
+            return rows;
+        }
+        return Object.fromEntries(Object.entries(node).map(([k, v]) => [k, this.toRecords(v)]));
+    },
+
     async getMarketData(ticker, period = '1y') {
-        return this._fetch('/market_data', { ticker, period });
+        return this._fetch('/market_data', { ticker, period }, this.BULK_FORMAT);
     },
 
     async priceOption(ticker, optionType, strike, daysToExpiry) {
@@ -34,8 +119,19 @@ const API = {
         });
     },
 
+    /**
+     * Price many contracts in one request. Each contract is an object with
+     * ticker, option_type, strike, days_to_expiry (or expiry), style,
+     * engines, greeks, quantity and market_price; see lib/batch_pricing.py.
+     */
+    async priceBatch(contracts) {
+        return this._fetch('/price_batch', {}, this.BULK_FORMAT, { contracts });
+    },
+
     async getOptionsChain(ticker, expiry) {
-        return this._fetch('/options_chain', { ticker, expiry: expiry || undefined });
+        return this._fetch(
+            '/options_chain', { ticker, expiry: expiry || undefined }, this.BULK_FORMAT
+        );
     },
 
     async getExpiries(ticker) {
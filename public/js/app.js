@@ -189,6 +189,17 @@
             ['Monte Carlo', 'Lookback', mc.lookback.price, mc.lookback.std_error],
             ['Monte Carlo', mc.barrier.barrier_type, mc.barrier.price, mc.barrier.std_error],
         ];
+        if (mc.barrier.pde_price != null) {
+            rows.push(['Finite Difference', mc.barrier.barrier_type, mc.barrier.pde_price, null]);
+        }
+        const an = data.analytic;
+        if (an) {
+            rows.push(
+                ['Analytic', 'Asian (Geo.)', an.asian_geometric.price, null],
+                ['Analytic', 'Lookback', an.lookback.price, null],
+                ['Analytic', an.barrier.barrier_type, an.barrier.price, null],
+            );
+        }
 
         rows.forEach(([model, style, price, se]) => {
             const tr = document.createElement('tr');
@@ -17,15 +17,33 @@ import os
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 
 from lib.market_data_fetcher import MarketDataFetcher, validate_ticker
 from lib.pricing_models import BlackScholesModel, MonteCarloModel, BinomialModel
+from lib.batch_pricing import price_contracts
+from lib.exotic_models import ExoticAnalyticModel
+from lib.market_data_cache import market_data_cache
+from lib.pricing_cache import PricingCache
+from lib.response_format import render
 
 app = Flask(__name__, static_folder="public", static_url_path="")
 CORS(app)
 
+# Process-wide cache of model results, keyed on rounded inputs + settings
+pricing_cache = PricingCache(max_entries=512, ttl=300)
+
+
+def negotiated(payload):
+    """Response in the format and compression the client's headers ask for."""
+    body, headers = render(
+        payload,
+        request.headers.get("Accept"),
+        request.headers.get("Accept-Encoding"),
+    )
+    return Response(body, headers=headers)
+
 
 @app.route("/")
 def index():
@@ -44,10 +62,12 @@ def api_index():
         "service": "Option Pricing API",
         "endpoints": [
             {"path": "/api", "method": "GET", "description": "Health check"},
-            {"path": "/api/market_data", "method": "GET", "params": "ticker, period"},
+            {"path": "/api/market_data", "method": "GET", "params": "ticker, period, orient"},
             {"path": "/api/price_option", "method": "GET", "params": "ticker, option_type, strike, days_to_expiry"},
-            {"path": "/api/options_chain", "method": "GET", "params": "ticker, expiry"},
+            {"path": "/api/price_batch", "method": "POST", "body": "{contracts: [{ticker, option_type, strike, days_to_expiry | expiry, style, engines, greeks, quantity, market_price}]}"},
+            {"path": "/api/options_chain", "method": "GET", "params": "ticker, expiry, only_expiries, model_iv, orient"},
             {"path": "/api/exchange_rate", "method": "GET", "params": "source, target"},
+            {"path": "/api/cache_stats", "method": "GET", "description": "Pricing and market data cache statistics"},
         ],
     })
 
@@ -56,9 +76,12 @@ def api_index():
 def market_data():
     ticker = request.args.get("ticker")
     period = request.args.get("period", "1y")
+    orient = request.args.get("orient", "records")
 
     if not ticker:
         return jsonify({"error": "Missing required parameter: ticker"}), 400
+    if orient not in ("records", "columns"):
+        return jsonify({"error": "orient must be 'records' or 'columns'"}), 400
 
     ticker = ticker.strip().upper()
     valid, _ = validate_ticker(ticker)
@@ -67,9 +90,9 @@ def market_data():
 
     try:
         fetcher = MarketDataFetcher(ticker)
-        return jsonify({
+        return negotiated({
             "stock_info": fetcher.get_stock_info(),
-            "historical_data": fetcher.get_historical_data(period=period),
+            "historical_data": fetcher.get_historical_data(period=period, orient=orient),
             "period": period,
         })
     except Exception as e:
@@ -119,9 +142,10 @@ def price_option():
         else:
             ms = "ITM" if moneyness < 0.98 else ("OTM" if moneyness > 1.02 else "ATM")
 
+        stock_info = fetcher.get_stock_info()
         market_data = {
             "ticker": ticker,
-            "name": fetcher.get_stock_info().get("name", ticker),
+            "name": stock_info.get("name", ticker),
             "spot_price": round(S, 4),
             "strike_price": round(K, 4),
             "days_to_expiry": days_to_expiry,
@@ -134,15 +158,41 @@ def price_option():
             "moneyness_ratio": round(moneyness, 4),
         }
 
-        bs = BlackScholesModel(S, K, T, r, sigma, q)
-        bs_results = bs.get_results(option_type)
+        inputs = (S, K, T, r, sigma, q, option_type)
+        bs_results = pricing_cache.get_or_compute(
+            "black_scholes", inputs, {},
+            lambda: BlackScholesModel(S, K, T, r, sigma, q).get_results(option_type),
+        )
 
         n_steps_calc = max(min(int(T * 252), 252), 21)
-        mc = MonteCarloModel(S, K, T, r, sigma, q, n_simulations=50000, n_steps=n_steps_calc)
-        mc_results = mc.get_results(option_type)
-
-        bn = BinomialModel(S, K, T, r, sigma, q, n_steps=200)
-        bn_results = bn.get_results(option_type)
+        # Adaptive sampling: stop once every payoff is priced to 0.5% (or
+        # to half a basis point of spot for near-worthless payoffs), with
+        # n_simulations as the cap and a time budget to bound latency
+        mc_settings = {
+            "n_simulations": 200000, "n_steps": n_steps_calc, "batch_size": 10000,
+            "rel_tolerance": 0.005, "spot_tolerance": 5e-5,
+            "time_budget": 2.0, "seed": 42, "barrier_pde_check": True,
+        }
+        mc_results = pricing_cache.get_or_compute(
+            "monte_carlo", inputs, mc_settings,
+            lambda: MonteCarloModel(
+                S, K, T, r, sigma, q, **mc_settings
+            ).get_results(option_type),
+        )
+
+        # Closed forms on the same monitoring dates as the simulation
+        analytic = ExoticAnalyticModel(
+            S, K, T, r, sigma, q, n_steps=mc_results["time_steps"]
+        )
+        analytic_results = analytic.get_results(option_type)
+
+        bn_settings = {"n_steps": 200}
+        bn_results = pricing_cache.get_or_compute(
+            "binomial", inputs, bn_settings,
+            lambda: BinomialModel(
+                S, K, T, r, sigma, q, **bn_settings
+            ).get_results(option_type),
+        )
 
         bs_price = bs_results["price"]
         bin_eu = bn_results["european_price"]
@@ -159,25 +209,58 @@ def price_option():
             },
         }
 
-        return jsonify({
+        return negotiated({
             "market_data": market_data,
             "black_scholes": bs_results,
             "monte_carlo": mc_results,
             "binomial": bn_results,
+            "analytic": analytic_results,
             "convergence": convergence,
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/price_batch", methods=["POST"])
+def price_batch():
+    body = request.get_json(silent=True)
+    contracts = body.get("contracts") if isinstance(body, dict) else body
+    if contracts is None:
+        return jsonify({"error": "Request body must be JSON with a 'contracts' list"}), 400
+
+    try:
+        # Market data is fetched once per ticker; contracts are priced in
+        # one vectorized pass per engine
+        result = price_contracts(
+            contracts, n_steps=200, max_contracts=10000, max_tree_contracts=2000
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return negotiated(result)
+
+
+@app.route("/api/cache_stats")
+def cache_stats():
+    return jsonify({
+        "pricing": pricing_cache.stats(),
+        "market_data": market_data_cache.stats(),
+    })
+
+
 @app.route("/api/options_chain")
 def options_chain():
     ticker = request.args.get("ticker")
     expiry = request.args.get("expiry")
     only_expiries = request.args.get("only_expiries", "false").lower() == "true"
+    model_iv = request.args.get("model_iv", "false").lower() == "true"
+    orient = request.args.get("orient", "records")
 
     if not ticker:
         return jsonify({"error": "Missing required parameter: ticker"}), 400
+    if orient not in ("records", "columns"):
+        return jsonify({"error": "orient must be 'records' or 'columns'"}), 400
 
     ticker = ticker.strip().upper()
     valid, _ = validate_ticker(ticker)
@@ -190,10 +273,12 @@ def options_chain():
         if only_expiries:
              return jsonify({"expiries": fetcher.get_options_expiries()})
 
-        chain = fetcher.get_options_chain(expiry=expiry)
+        chain = fetcher.get_options_chain(
+            expiry=expiry, model_iv=model_iv, orient=orient
+        )
         chain["ticker"] = ticker
         chain["spot_price"] = round(fetcher.spot_price, 2)
-        return jsonify(chain)
+        return negotiated(chain)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 